@@ -1,205 +1,236 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import concurrent.futures
+import asyncio
+import queue
+import threading
 import time
 
+from api.http_client import fetch, configure_pool, create_async_session, fetch_async, aiohttp
+from api.rate_limiter import MAX_CONCURRENCY
+from api.fnguide_parser import MAIN_DEFAULTS, PARSER_VERSION, parse_main_page, parse_finance_page
+from api import response_cache
+
+MAIN_URL = "https://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A{code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=101&stkGb=701"
+FINANCE_URL = "https://comp.fnguide.com/SVO2/ASP/SVD_Finance.asp?pGB=1&gicode=A{code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=103&stkGb=701"
+
+# asyncio 엔진의 기본 동시 처리 종목 수 (종목당 2페이지 요청)
+# 실제 comp.fnguide.com 동시 요청 수는 호스트별 제한기(api/rate_limiter.py)가 결정합니다.
+# (시작 16개, 정상 응답이 이어지면 MAX_CONCURRENCY까지 증가) 그 이상 종목을 열어도 제한기 앞에서 대기만 하므로
+# 상한에 맞춰 종목 수를 정함
+DEFAULT_ASYNC_CONCURRENCY = MAX_CONCURRENCY // 2
+
+
+def _merge_snapshot(code, main_data, fin_data):
+    """
+    페이지별로 독립 파싱한 결과를 하나의 레코드로 합칩니다.
+    한쪽 페이지만 실패한 경우 나머지 결과는 유지하고, 둘 다 실패하면 None을 반환합니다.
+    """
+    if main_data is None and not fin_data:
+        return None
+
+    data = {"code": code}
+    data.update(main_data if main_data is not None else MAIN_DEFAULTS)
+    if fin_data:
+        data.update(fin_data)
+    return data
+
+
+def _parse_cached(digest, parser, html=None):
+    """
+    본문 해시 기준으로 파싱 결과를 재사용합니다. 내용이 바뀌지 않았으면 파싱을 생략합니다.
+    (파서 수정 시 PARSER_VERSION을 올리면 디스크의 원본으로 다시 파싱됨)
+    """
+    parser_key = f"{parser.__name__}_v{PARSER_VERSION}"
+    parsed = response_cache.get_parsed(digest, parser_key)
+    if parsed is None:
+        if html is None:
+            html = response_cache.load_body(digest)
+        parsed = parser(html)
+        response_cache.put_parsed(digest, parser_key, parsed)
+    return parsed
+
+
+def _resolve_page(url, parser, entry, status, html, headers):
+    """응답(200 또는 304)을 원본 캐시에 반영하고 파싱 결과를 반환합니다."""
+    if status == 304 and entry:
+        response_cache.touch(url, entry)
+        return _parse_cached(entry["sha256"], parser)
+
+    if status != 200:
+        return None
+
+    digest = response_cache.store(url, html, headers)
+    return _parse_cached(digest, parser, html)
+
+
+def _load_page(url, parser, code):
+    try:
+        entry = response_cache.get_entry(url)
+        response = fetch(url, headers=response_cache.conditional_headers(entry), timeout=5)
+        return _resolve_page(url, parser, entry, response.status_code, response.text, response.headers)
+    except Exception as e:
+        print(f"Error scraping {code} ({parser.__name__}): {e}")
+        return None
+
+
+async def _load_page_async(session, url, parser, code):
+    # 파싱과 캐시 디스크 I/O는 스레드 풀에서 실행 (이벤트 루프를 막으면 다른 요청이 모두 멈춤)
+    loop = asyncio.get_running_loop()
+    try:
+        entry = await loop.run_in_executor(None, response_cache.get_entry, url)
+        status, html, headers = await fetch_async(session, url, headers=response_cache.conditional_headers(entry), timeout=5)
+        return await loop.run_in_executor(None, _resolve_page, url, parser, entry, status, html, headers)
+    except Exception as e:
+        print(f"Error scraping {code} ({parser.__name__}): {e}")
+        return None
+
+
+def _load_page_offline(url, parser, code):
+    entry = response_cache.get_entry(url)
+    if entry is None:
+        return None
+    try:
+        return _parse_cached(entry["sha256"], parser)
+    except Exception as e:
+        print(f"Error parsing cached page {code} ({parser.__name__}): {e}")
+        return None
+
+
 def get_company_snapshot(code):
     """
     Company Guide(FnGuide)에서 기업의 주요 지표(PER, PBR, ROE, 배당수익률 등)를 스크래핑합니다.
     URL: https://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?gicode=A{code}
+
+    Main(시세/ROE)과 Finance(이익잉여금, 현금 등 재무상태표) 페이지를 동시에 요청하고 각각 파싱합니다.
     """
-    try:
-        url = f"https://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A{code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=101&stkGb=701"
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-        
-        if response.status_code != 200:
-            return None
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 데이터 추출 로직 (Selector는 사이트 구조에 따라 변동 가능)
-        # Snapshot 페이지의 'CorpGroup' 클래스 활용 또는 특정 테이블 위치
-        
-        # 1. 시세 현황 (PBR, PER, 배당수익률)
-        # 보통 #corp_group2 하위 테이블에 위치
-        
-        data = {
-            "code": code,
-            "pbr": None,
-            "per": None,
-            "dividend_yield": 0.0,
-            "roe": None,
-            "treasury_shares": 0.0 # 자사주 비중 (Optional)
-        }
-        
-        # PBR/PER/배당수익률 찾기 (ID 기반 검색이 안정적)
-        # FnGuide는 동적으로 생성되기도 하지만, 기본 HTML에 포함됨.
-        
-        # Table Parsing Helper
-        def parse_metric(soup, label_list):
-            for label in label_list:
-                # dl, dt, dd 구조 혹은 table 구조 확인
-                # FnGuide Snapshot 쪽 '재무비율' 섹션 확인
-                pass
-        
-        # CorpInfo (우측 상단 요약) - PER, 12M PER, 업종 PER, PBR, 배당수익률
-        corp_group2 = soup.find('div', {'id': 'corp_group2'})
-        if corp_group2:
-            dts = corp_group2.find_all('dt')
-            dds = corp_group2.find_all('dd')
-            
-            for dt, dd in zip(dts, dds):
-                text = dt.text.strip()
-                val_text = dd.text.strip().replace(',', '')
-                
-                if 'PER' in text and '12M' not in text and '업종' not in text:
-                    try: data['per'] = float(val_text)
-                    except: pass
-                elif 'PBR' in text:
-                    try: data['pbr'] = float(val_text)
-                    except: pass
-                elif '배당수익률' in text:
-                    try: data['dividend_yield'] = float(val_text.replace('%', ''))
-                    except: pass
-        
-        # ROE 찾기 (Highlight D 테이블 - Main Page)
-        highlight_d_div = soup.find('div', {'id': 'highlight_D_Y'})
-        if highlight_d_div:
-            trs = highlight_d_div.find_all('tr')
-            for tr in trs:
-                th = tr.find('th')
-                if th and 'ROE' in th.text:
-                    tds = tr.find_all('td')
-                    valid_roes = []
-                    for td in tds:
-                        try:
-                            val = float(td.text.replace(',', '').strip())
-                            valid_roes.append(val)
-                        except:
-                            pass
-                    if valid_roes:
-                        data['roe'] = valid_roes[-1]
-
-        # --- [Add] Financial Statement Parsing (SVD_Finance.asp) ---
-        # 이익잉여금, 현금및현금성자산, 유동자산, 자본총계 추출
-        try:
-            url_fin = f"https://comp.fnguide.com/SVO2/ASP/SVD_Finance.asp?pGB=1&gicode=A{code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=103&stkGb=701"
-            res_fin = requests.get(url_fin, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-            
-            if res_fin.status_code == 200:
-                soup_fin = BeautifulSoup(res_fin.text, 'html.parser')
-                
-                # 대차대조표 (연간) - divDaechaY
-                div_bs = soup_fin.find('div', {'id': 'divDaechaY'})
-                if div_bs:
-                    # Helper to find value in table
-                    def find_val(soup_obj, keywords):
-                        # Find all trs, check first th/td for keyword
-                        # Then get the last valid column (Recent Year)
-                        trs = soup_obj.find_all('tr')
-                        for tr in trs:
-                            # Header usually in 'th' or 'td' with class 'l' (left aligned)
-                            header = tr.find(['th', 'td']) 
-                            
-                            if header:
-                                # Clean text
-                                txt = header.text.strip().replace(' ', '').replace('\n', '').replace('\xa0', '')
-                                
-                                # Check partial match for any keyword
-                                matched = False
-                                for k in keywords:
-                                    if k in txt:
-                                        matched = True
-                                        break
-                                
-                                if matched:
-                                    # Get values (usually tds not class 'l')
-                                    # FnGuide structure: 
-                                    # <tr> <th class="l">Label</th> <td class="r">Val1</td> <td class="r">Val2</td> ... </tr>
-                                    cols = tr.find_all('td')
-                                    
-                                    # Filter columns that look like data (class 'r' or just numbers)
-                                    # And filter out class 'l' if it was a td header
-                                    data_cols = [c for c in cols if 'l' not in c.get('class', [])]
-                                    
-                                    # Extract values
-                                    vals = []
-                                    for c in data_cols:
-                                        try:
-                                            # remove commas, check if valid number
-                                            t_val = c.text.strip().replace(',', '')
-                                            if t_val and t_val != '-':
-                                                vals.append(float(t_val))
-                                            else:
-                                                vals.append(0.0) # explicit missing
-                                        except: 
-                                            pass
-                                            
-                                    # Return the most recent valid value (usually last column is latest year, or second to last if estimate exists)
-                                    # FnGuide Annual: Usually 4 columns. Last one might be 'Last Year' or 'Current Year Estimate'??
-                                    # Usually columns are [Y-3, Y-2, Y-1, Y(Recent)]
-                                    if vals:
-                                        return vals[-1]
-                        return 0.0
-
-                    # 1. 자본총계 (Total Equity)
-                    equity = find_val(div_bs, ['자본총계', '자본'])
-                    
-                    # 2. 이익잉여금 (Retained Earnings)
-                    retained = find_val(div_bs, ['이익잉여금', '미처분이익잉여금', '이익잉여금(결손금)'])
-                    
-                    # 3. 유동자산 (Current Assets)
-                    cur_asset = find_val(div_bs, ['유동자산'])
-                    
-                    # 4. 현금및현금성자산 (Cash)
-                    cash = find_val(div_bs, ['현금및현금성자산', '현금', '현금및해당자산', '현금및예치금'])
-
-                    data['equity'] = equity
-                    data['retained'] = retained
-                    data['current_assets'] = cur_asset
-                    data['cash_equivalents'] = cash
-                    
-                    # Calculate Ratios
-                    # 이익잉여금비율 (%) = (이익잉여금 / 자본총계) * 100
-                    if equity > 0 and retained > 0:
-                        data['retained_rate'] = round((retained / equity) * 100, 1)
-                    else:
-                        data['retained_rate'] = 0.0
-                        
-                    # 현금비중 (%) = (현금 / 유동자산) * 100
-                    if cur_asset > 0 and cash > 0:
-                        data['cash_ratio'] = round((cash / cur_asset) * 100, 1)
-                    else:
-                        data['cash_ratio'] = 0.0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        future_fin = executor.submit(_load_page, FINANCE_URL.format(code=code), parse_finance_page, code)
+        main_data = _load_page(MAIN_URL.format(code=code), parse_main_page, code)
+        fin_data = future_fin.result()
 
-        except Exception as e:
-            # print(f"Fin details parsing error {code}: {e}")
-            pass
+    return _merge_snapshot(code, main_data, fin_data)
+
+
+async def _get_company_snapshot_async(session, code):
+    """
+    get_company_snapshot의 asyncio 버전. Main/Finance 페이지를 gather로 동시에 요청합니다.
+    """
+    main_data, fin_data = await asyncio.gather(
+        _load_page_async(session, MAIN_URL.format(code=code), parse_main_page, code),
+        _load_page_async(session, FINANCE_URL.format(code=code), parse_finance_page, code),
+    )
+    return _merge_snapshot(code, main_data, fin_data)
 
-        return data
 
+def _notify(on_result, data):
+    if on_result is None or not data:
+        return
+    try:
+        on_result(data)
     except Exception as e:
-        print(f"Error scraping {code}: {e}")
-        return None
+        print(f"Result callback error for {data.get('code')}: {e}")
+
 
-def get_batch_company_data(codes, max_workers=10):
+async def _crawl_async(codes, concurrency, emit):
     """
-    여러 기업의 데이터를 병렬로 수집합니다.
-    (Blocking 방지를 위해 worker 수 조정: 4 -> 20)
+    Semaphore로 동시 처리 종목 수를 제한하며 전체 종목을 비동기로 수집합니다.
+    종목 1건이 끝날 때마다 emit(code, data)를 호출합니다 (실패 시 data=None).
     """
-    results = []
-    # max_workers reduced to 8 for stability (Code Review Feedback)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(session, code):
+        async with semaphore:
+            data = await _get_company_snapshot_async(session, code)
+        emit(code, data)
+
+    # 종목당 Main/Finance 2개 요청이 동시에 열릴 수 있으므로 연결 수는 2배로 잡음
+    async with create_async_session(concurrency * 2) as session:
+        await asyncio.gather(*(worker(session, code) for code in codes))
+
+
+def _iter_async(codes, concurrency, on_result):
+    """
+    별도 스레드의 이벤트 루프에서 크롤링을 실행하고 완료 순서대로 결과를 전달합니다.
+    (호출 스레드에 이미 실행 중인 이벤트 루프가 있어도 동작)
+    """
+    results = queue.Queue()
+    finished = object()
+
+    def emit(code, data):
+        # 체크포인트 등 콜백은 수집 스레드에서 호출 -> 소비자가 중단되어도 기록은 계속됨
+        _notify(on_result, data)
+        results.put((code, data))
+
+    def run():
+        try:
+            asyncio.run(_crawl_async(codes, concurrency, emit))
+            response_cache.maybe_prune()
+        except Exception as e:
+            print(f"Async crawl error: {e}")
+        finally:
+            results.put(finished)
+
+    threading.Thread(target=run, name="fnguide-crawl", daemon=True).start()
+
+    while True:
+        item = results.get()
+        if item is finished:
+            return
+        yield item
+
+
+def _iter_threads(codes, max_workers, on_result):
+    # 공유 세션의 호스트별 커넥션 풀을 worker 수에 맞춤 (연결 재사용, 종목당 2페이지 동시 요청)
+    configure_pool(max_workers * 2)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_code = {executor.submit(get_company_snapshot, code): code for code in codes}
-        
+
         for future in concurrent.futures.as_completed(future_to_code):
             code = future_to_code[future]
             try:
                 data = future.result()
-                if data:
-                    results.append(data)
             except Exception as e:
                 print(f"Exception for {code}: {e}")
-                
-    return pd.DataFrame(results)
+                data = None
+            _notify(on_result, data)
+            yield code, data
+
+    response_cache.maybe_prune()
+
+
+def load_cached_snapshot(code):
+    """
+    네트워크 요청 없이 디스크에 저장된 원본 HTML만으로 스냅샷을 재구성합니다.
+    (파서 수정 후 전체 재파싱 등에 사용)
+    """
+    main_data = _load_page_offline(MAIN_URL.format(code=code), parse_main_page, code)
+    fin_data = _load_page_offline(FINANCE_URL.format(code=code), parse_finance_page, code)
+    return _merge_snapshot(code, main_data, fin_data)
+
+
+def rebuild_batch_from_cache(codes):
+    """load_cached_snapshot을 여러 종목에 적용합니다. get_batch_company_data와 같은 스키마를 반환합니다."""
+    results = [load_cached_snapshot(code) for code in codes]
+    return pd.DataFrame([data for data in results if data])
+
+
+def iter_batch_company_data(codes, max_workers=8, engine="async", concurrency=DEFAULT_ASYNC_CONCURRENCY, on_result=None):
+    """
+    여러 기업의 데이터를 병렬로 수집하면서 완료되는 순서대로 (code, data)를 yield 합니다.
+    수집에 실패한 종목은 data가 None 입니다. (진행률 표시, 점진적 화면 갱신용)
+    engine:
+      - "async": asyncio + aiohttp 엔진. concurrency개 종목을 동시에 처리 (기본값)
+      - "thread": ThreadPoolExecutor 엔진 (max_workers개 스레드, aiohttp 미설치 시 자동 사용)
+    on_result: 종목 1건 수집 완료 시마다 호출되는 콜백 (체크포인트 기록 등)
+    """
+    if engine == "async" and aiohttp is not None:
+        return _iter_async(codes, concurrency, on_result)
+    return _iter_threads(codes, max_workers, on_result)
+
+
+def get_batch_company_data(codes, max_workers=8, engine="async", concurrency=DEFAULT_ASYNC_CONCURRENCY, on_result=None):
+    """
+    여러 기업의 데이터를 병렬로 수집합니다. (iter_batch_company_data의 결과를 DataFrame으로 모음)
+    """
+    stream = iter_batch_company_data(codes, max_workers, engine, concurrency, on_result)
+    return pd.DataFrame([data for _, data in stream if data])
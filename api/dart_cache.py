@@ -0,0 +1,139 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from utils.atomic_io import write_parquet
+from utils.cache_policy import KST
+
+# DART 응답 디스크 캐시 (parquet)
+# - 이미 공시된 과거 연도 보고서는 바뀌지 않으므로 만료 없이 보관
+# - 당해 연도 보고서와 빈 응답(아직 미공시)은 짧은 TTL 후 다시 조회
+# - 최대주주 현황은 정기보고서(사업연도, 보고서 코드)별로 보관 (정기공시가 나오면 다시 조회)
+
+CACHE_DIR = os.path.join("data", "dart_cache")
+FINSTATE_DIR = os.path.join(CACHE_DIR, "finstate")
+SHAREHOLDER_DIR = os.path.join(CACHE_DIR, "shareholders")
+
+# 당해 연도 / 빈 응답 캐시 유효 시간(초)
+SHORT_TTL = 6 * 60 * 60
+
+# 분기 -> 해당 분기말 기준 정기보고서 코드 (1분기/반기/3분기/사업보고서)
+QUARTER_REPORTS = {1: '11013', 2: '11012', 3: '11014', 4: '11011'}
+
+
+def _finstate_path(corp_code, year, reprt_code):
+    return os.path.join(FINSTATE_DIR, str(corp_code), f"{year}_{reprt_code}.parquet")
+
+
+def _shareholder_path(corp_code, year, reprt_code):
+    return os.path.join(SHAREHOLDER_DIR, str(corp_code), f"{year}_{reprt_code}.parquet")
+
+
+def recent_report_periods(count=2):
+    """
+    가장 최근에 끝난 분기부터 정기보고서 (사업연도, 보고서 코드)를 최신순으로 count개 반환합니다.
+    (예: 2026-10-18 -> [(2026, '11014'), (2026, '11012')], 첫 보고서는 제출 기한 전일 수 있음)
+    """
+    now = pd.Timestamp.now(tz=KST)
+    year, quarter = now.year, now.quarter
+    periods = []
+    for _ in range(count):
+        year, quarter = (year - 1, 4) if quarter == 1 else (year, quarter - 1)
+        periods.append((year, QUARTER_REPORTS[quarter]))
+    return periods
+
+
+def _is_closed_period(year):
+    return int(year) < pd.Timestamp.now(tz=KST).year
+
+
+def get_finstate(corp_code, year, reprt_code):
+    """
+    캐시된 finstate 결과를 반환합니다. 없거나 만료되었으면 None.
+    (빈 DataFrame = 해당 보고서 없음으로 캐시된 상태)
+    """
+    path = _finstate_path(corp_code, year, reprt_code)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e:
+        print(f"DART cache read error ({path}): {e}")
+        return None
+
+    if df.empty or not _is_closed_period(year):
+        if time.time() - os.path.getmtime(path) > SHORT_TTL:
+            return None
+    return df
+
+
+def put_finstate(corp_code, year, reprt_code, df):
+    try:
+        write_parquet(_finstate_path(corp_code, year, reprt_code), df if df is not None else pd.DataFrame())
+    except Exception as e:
+        print(f"DART cache write error ({corp_code}, {year}, {reprt_code}): {e}")
+
+
+def cached_finstate(dart, corp_code, year, reprt_code):
+    """
+    dart.finstate 호출을 캐시를 거쳐 수행합니다. 조회 중 예외가 나면 캐시하지 않고 그대로 전달합니다.
+    """
+    df = get_finstate(corp_code, year, reprt_code)
+    if df is not None:
+        return df
+
+    df = dart.finstate(corp_code, year, reprt_code=reprt_code)
+    if df is None:
+        df = pd.DataFrame()
+    put_finstate(corp_code, year, reprt_code, df)
+    return df
+
+
+def invalidate_corp(corp_code):
+    """기업의 캐시된 DART 응답을 모두 삭제합니다. (신규/정정 공시 발생 시)"""
+    path = os.path.join(FINSTATE_DIR, str(corp_code))
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def invalidate_shareholders(corp_code):
+    """기업의 캐시된 최대주주 현황을 삭제합니다. (정기공시 발생 시)"""
+    path = os.path.join(SHAREHOLDER_DIR, str(corp_code))
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def get_shareholders(corp_code, year, reprt_code):
+    """캐시된 최대주주 현황을 반환합니다. 없거나 만료되었으면 None. (빈 응답은 SHORT_TTL 동안 유효)"""
+    path = _shareholder_path(corp_code, year, reprt_code)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e:
+        print(f"DART cache read error ({path}): {e}")
+        return None
+    if df.empty and time.time() - os.path.getmtime(path) > SHORT_TTL:
+        return None
+    return df
+
+
+def cached_shareholders(dart, corp_code, year, reprt_code):
+    """
+    정기보고서 최대주주 현황(hyslrSttus) 조회를 (사업연도, 보고서 코드)별 캐시를 거쳐 수행합니다.
+    제출된 보고서는 만료 없이 보관하고, 빈 응답(미제출)은 SHORT_TTL 후 재조회합니다.
+    """
+    df = get_shareholders(corp_code, year, reprt_code)
+    if df is not None:
+        return df
+
+    df = dart.report(corp_code, '최대주주', year, reprt_code=reprt_code)
+    # 응답 컬럼 타입이 섞여 있을 수 있어 문자열로 저장 (수치 변환은 사용하는 쪽에서 처리)
+    df = pd.DataFrame() if df is None else df.astype(str)
+    try:
+        write_parquet(_shareholder_path(corp_code, year, reprt_code), df)
+    except Exception as e:
+        print(f"DART cache write error ({corp_code}, {year}, {reprt_code}, shareholders): {e}")
+    return df
@@ -0,0 +1,286 @@
+import atexit
+import copy
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+from api.http_client import fetch
+from utils.atomic_io import write_json
+from utils.cache_policy import KST
+
+# DART API 일일 요청 한도 관리
+# - 키별 당일 요청 수를 집계하여 디스크에 보관 (키 원문 대신 해시로 저장)
+# - 남은 요청이 적은 키는 건너뛰고 키 풀의 다음 키 사용
+# - 한도 초과 응답(status 020)을 받으면 해당 키를 당일 소진 처리 후 다음 키로 재시도
+# - 주로 쓰는 finstate / major_shareholders / report / list는 응답 status를 직접 확인
+#   (OpenDartReader는 오류 응답을 출력만 하고 빈 DataFrame을 반환하므로 한도 초과가 '데이터 없음'으로 보임)
+
+QUOTA_FILE = os.path.join("data", "dart_cache", "quota.json")
+
+# 키당 일일 요청 한도 (개인 인증키 기준)
+DAILY_LIMIT = 20000
+
+# 남은 요청이 이보다 적으면 다음 키 우선 사용
+LOW_WATERMARK = 200
+
+# 카운터 저장 주기(초)
+SAVE_INTERVAL = 5.0
+
+# 한도 초과 응답 판별 (status 020: 사용한도 초과)
+QUOTA_ERROR = re.compile(r"status\W+020|사용한도")
+QUOTA_STATUS = "020"
+
+# 정상 응답 status (000: 정상, 013: 조회된 데이터 없음) -> 이 외의 status는 예외로 처리하여 캐시되지 않게 함
+OK_STATUSES = {"000", "013"}
+
+DART_API_URL = "https://opendart.fss.or.kr/api/"
+DART_TIMEOUT = 10
+
+# 네트워크 요청이 없는 OpenDartReader 메서드
+UNMETERED_CALLS = {"find_corp_code"}
+
+# 정기보고서 주요정보 키워드 -> API (OpenDartReader.report와 같은 키워드)
+REPORT_ENDPOINTS = {
+    '최대주주': 'hyslrSttus.json',       # 최대주주 현황
+    '최대주주변동': 'hyslrChgSttus.json', # 최대주주 변동현황
+    '소액주주': 'mrhlSttus.json',         # 소액주주 현황
+}
+
+_lock = threading.Lock()
+_state = None
+_last_save = 0.0
+
+
+def _fingerprint(key):
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _today():
+    return datetime.datetime.now(KST).strftime("%Y%m%d")
+
+
+def _load_state():
+    if os.path.exists(QUOTA_FILE):
+        try:
+            with open(QUOTA_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading DART quota state: {e}")
+    return {"date": _today(), "keys": {}}
+
+
+def _key_state(key):
+    # _lock 안에서 호출. 날짜가 바뀌면 카운터 초기화 (DART 한도는 자정 기준)
+    global _state
+    if _state is None:
+        _state = _load_state()
+    if _state["date"] != _today():
+        _state = {"date": _today(), "keys": {}}
+    return _state["keys"].setdefault(_fingerprint(key), {"calls": 0, "exhausted": False})
+
+
+def _save(force=False):
+    # _lock 안에서 호출
+    global _last_save
+    now = time.monotonic()
+    if _state is None or (not force and now - _last_save < SAVE_INTERVAL):
+        return
+    _last_save = now
+    try:
+        write_json(QUOTA_FILE, _state)
+    except Exception as e:
+        print(f"Error saving DART quota state: {e}")
+
+
+def record(key, calls=1):
+    with _lock:
+        _key_state(key)["calls"] += calls
+        _save()
+
+
+def mark_exhausted(key):
+    with _lock:
+        _key_state(key)["exhausted"] = True
+        _save(force=True)
+
+
+def remaining(key):
+    with _lock:
+        state = _key_state(key)
+        if state["exhausted"]:
+            return 0
+        return max(0, DAILY_LIMIT - state["calls"])
+
+
+def flush():
+    with _lock:
+        _save(force=True)
+
+
+atexit.register(flush)
+
+
+class DartApiError(RuntimeError):
+    """DART API 오류 응답 (status가 정상/데이터 없음이 아닌 경우)"""
+
+    def __init__(self, status, message):
+        super().__init__(f"DART API status {status}: {message}")
+        self.status = status
+
+
+class KeyPool:
+    """
+    여러 API Key의 당일 잔여 한도를 보고 요청에 사용할 키를 고릅니다.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(key for key in keys if key))
+
+    def select(self):
+        """
+        잔여 한도가 LOW_WATERMARK 이상인 첫 번째 키, 없으면 잔여 한도가 가장 많은 키를 반환합니다.
+        모든 키가 소진되었으면 None.
+        """
+        best_key, best_remaining = None, 0
+        for key in self.keys:
+            left = remaining(key)
+            if left >= LOW_WATERMARK:
+                return key
+            if left > best_remaining:
+                best_key, best_remaining = key, left
+        return best_key
+
+    def remaining(self):
+        return sum(remaining(key) for key in self.keys)
+
+    def can_afford(self, calls):
+        return self.remaining() >= calls
+
+    def usage(self):
+        """키별 당일 사용량 (키 원문 대신 해시 앞자리 표시)"""
+        return [{"key": _fingerprint(key)[:6], "remaining": remaining(key)} for key in self.keys]
+
+
+class MeteredDart:
+    """
+    OpenDartReader를 감싸 요청마다 한도를 집계하고 키를 교체합니다.
+    OpenDartReader는 요청 시점의 api_key 속성을 사용하므로 키마다 별도 리더를 둡니다.
+    (공유 리더의 api_key를 바꾸면 동시에 실행 중인 다른 스레드의 요청이 엉뚱한 키로 나갈 수 있음)
+    """
+
+    def __init__(self, reader, pool):
+        self._reader = reader
+        self._pool = pool
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+
+    def _reader_for(self, key):
+        with self._readers_lock:
+            reader = self._readers.get(key)
+            if reader is None:
+                # 얕은 복사 -> 고유번호 목록(corp_codes)은 공유하고 api_key만 다름
+                reader = copy.copy(self._reader)
+                reader.api_key = key
+                self._readers[key] = reader
+            return reader
+
+    def _call(self, fn):
+        """
+        키를 골라 fn(key)를 실행합니다. 한도 초과면 해당 키를 당일 소진 처리하고 다음 키로 재시도합니다.
+        """
+        while True:
+            key = self._pool.select()
+            if key is None:
+                raise RuntimeError("DART API 일일 요청 한도를 모두 사용했습니다.")
+            record(key)
+            try:
+                return fn(key)
+            except Exception as e:
+                if getattr(e, "status", None) != QUOTA_STATUS and not QUOTA_ERROR.search(str(e)):
+                    raise
+                print(f"DART quota exceeded for key {_fingerprint(key)[:6]}, rotating")
+                mark_exhausted(key)
+
+    def _request(self, endpoint, params):
+        """
+        DART API를 호출하고 응답 status를 확인합니다.
+        Returns: 응답 JSON (status 000 또는 013)
+        Raises: DartApiError (한도 초과는 키 교체 후 재시도, 모든 키 소진 시 RuntimeError)
+        """
+        def request(key):
+            response = fetch(DART_API_URL + endpoint, params=dict(params, crtfc_key=key), timeout=DART_TIMEOUT)
+            jo = response.json()
+            status = jo.get("status")
+            if status not in OK_STATUSES:
+                raise DartApiError(status, jo.get("message"))
+            return jo
+
+        return self._call(request)
+
+    def _corp_code(self, corp):
+        corp = str(corp).strip()
+        # 이미 고유번호(8자리)면 전체 목록 검색 생략
+        if len(corp) == 8 and corp.isdigit():
+            return corp
+        corp_code = self._reader.find_corp_code(corp)
+        if not corp_code:
+            raise ValueError(f'could not find "{corp}"')
+        return corp_code
+
+    def finstate(self, corp, bsns_year, reprt_code='11011'):
+        """OpenDartReader.finstate와 같은 결과 (쉼표로 연결하면 다중회사 주요계정 API)"""
+        corp_codes = [self._corp_code(c) for c in str(corp).split(',')]
+        endpoint = 'fnlttMultiAcnt.json' if len(corp_codes) > 1 else 'fnlttSinglAcnt.json'
+        jo = self._request(endpoint, {'corp_code': ','.join(corp_codes), 'bsns_year': bsns_year, 'reprt_code': reprt_code})
+        return pd.DataFrame(jo.get('list', []))
+
+    def major_shareholders(self, corp):
+        """OpenDartReader.major_shareholders와 같은 결과 (대량보유 상황보고)"""
+        jo = self._request('majorstock.json', {'corp_code': self._corp_code(corp)})
+        return pd.DataFrame(jo.get('list', []))
+
+    def report(self, corp, key_word, bsns_year, reprt_code='11011'):
+        """OpenDartReader.report와 같은 결과 (정기보고서 주요정보, REPORT_ENDPOINTS 키워드만 지원)"""
+        if key_word not in REPORT_ENDPOINTS:
+            raise ValueError(f'unsupported report key_word "{key_word}"')
+        jo = self._request(REPORT_ENDPOINTS[key_word], {'corp_code': self._corp_code(corp), 'bsns_year': bsns_year, 'reprt_code': reprt_code})
+        return pd.DataFrame(jo.get('list', []))
+
+    def list(self, corp=None, start=None, end=None, kind='', kind_detail='', final=True):
+        """OpenDartReader.list와 같은 결과 (공시검색, 전체 페이지 조회)"""
+        params = {
+            'corp_code': self._corp_code(corp) if corp else '',
+            'bgn_de': pd.to_datetime(start).strftime('%Y%m%d') if start else '19000101',
+            'end_de': pd.to_datetime(end).strftime('%Y%m%d') if end else datetime.datetime.now(KST).strftime('%Y%m%d'),
+            'last_reprt_at': 'Y' if final else 'N',
+            'page_count': 100,
+        }
+        if kind:
+            params['pblntf_ty'] = kind
+        if kind_detail:
+            params['pblntf_detail_ty'] = kind_detail
+
+        frames = []
+        page, total_page = 1, 1
+        while page <= total_page:
+            jo = self._request('list.json', dict(params, page_no=page))
+            frames.append(pd.DataFrame(jo.get('list', [])))
+            total_page = int(jo.get('total_page') or 1)
+            page += 1
+        return pd.concat(frames, ignore_index=True)
+
+    def __getattr__(self, name):
+        attr = getattr(self._reader, name)
+        if not callable(attr) or name.startswith("_") or name in UNMETERED_CALLS:
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(lambda key: getattr(self._reader_for(key), name)(*args, **kwargs))
+
+        return call
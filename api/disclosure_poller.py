@@ -0,0 +1,130 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from api import dart_cache, disclosure_store
+from utils.atomic_io import write_json
+from utils.cache_policy import KST
+
+# 전체 시장 공시 피드 폴러
+# - 마지막 조회 이후 접수된 정기공시(A)만 확인 (재무제표, 최대주주 현황 모두 정기보고서 기준)
+# - 공시를 낸 기업의 DART 캐시만 무효화하고, 앱 콜백(on_change)으로 스냅샷 행 갱신을 요청
+# 벽시계 기준 일괄 만료 대신 실제로 바뀐 기업만 갱신하기 위함
+
+STATE_FILE = os.path.join(dart_cache.CACHE_DIR, "disclosure_poller.json")
+
+# 조회 주기(초)
+POLL_INTERVAL = 10 * 60
+
+# 회사를 지정하지 않은 공시검색(list.json)의 최대 검색 기간 (개월)
+FEED_WINDOW_MONTHS = 3
+
+# DART 공시 유형 (pblntf_ty)
+PERIODIC_KIND = 'A'   # 정기공시: 사업/반기/분기보고서
+
+
+class DisclosurePoller:
+    """
+    list_fn(start, end, kind) -> DataFrame : 전체 시장 공시 목록 조회 (OpenDartReader.list)
+    on_change(periodic_codes) : 영향 받은 종목코드로 앱 캐시를 갱신하는 콜백
+    """
+
+    def __init__(self, list_fn, on_change=None, interval=POLL_INTERVAL):
+        self._list_fn = list_fn
+        self._on_change = on_change
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._worker = None
+        self.last_poll = None
+        self.version = 0 # 영향 받은 기업이 있는 조회마다 증가
+
+    def start(self):
+        """백그라운드 조회 스레드를 시작합니다 (이미 실행 중이면 무시)."""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="disclosure-poller", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Disclosure poller error: {e}")
+            time.sleep(self._interval)
+
+    def _load_state(self):
+        if os.path.exists(STATE_FILE):
+            try:
+                with open(STATE_FILE, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading poller state: {e}")
+        # 최초 실행: 과거 공시는 재처리하지 않고 오늘부터 추적
+        return {"last_dt": datetime.datetime.now(KST).strftime("%Y%m%d"), "seen": []}
+
+    def _save_state(self, state):
+        write_json(STATE_FILE, state)
+
+    def poll_once(self):
+        """
+        마지막 조회일 이후 신규 공시를 확인하고 영향 받은 기업의 캐시를 무효화합니다.
+        Returns: 정기공시 종목코드 목록
+        """
+        state = self._load_state()
+        now = datetime.datetime.now(KST)
+        today = now.strftime("%Y%m%d")
+        seen = set(state["seen"])
+
+        # 오래 중단되었던 경우 검색 가능 기간으로 제한 (그 이전 공시는 놓친 것으로 기록)
+        start = state["last_dt"]
+        earliest = (now - pd.DateOffset(months=FEED_WINDOW_MONTHS) + datetime.timedelta(days=1)).strftime("%Y%m%d")
+        if start < earliest:
+            print(f"Disclosure poller: filings between {start} and {earliest} were not checked (feed window is {FEED_WINDOW_MONTHS} months)")
+            start = earliest
+
+        filings = self._list_fn(start, today, PERIODIC_KIND)
+        if filings is None or filings.empty:
+            if start != state["last_dt"]:
+                # 놓친 구간은 한 번만 기록
+                self._save_state({"last_dt": start, "seen": []})
+            self.last_poll = time.time()
+            return []
+
+        filings = filings.copy()
+        filings['stock_code'] = filings['stock_code'].fillna('').astype(str).str.strip()
+
+        # 상장사의 신규 공시만 처리
+        new = filings[~filings['rcept_no'].isin(seen) & filings['stock_code'].ne('')]
+
+        # 정기보고서(정정 포함)를 낸 기업만 삭제: 재무제표, 최대주주 현황 캐시, 공시 목록(다음 조회 시 동기화)
+        for corp_code in new['corp_code'].unique():
+            dart_cache.invalidate_corp(corp_code)
+            dart_cache.invalidate_shareholders(corp_code)
+            disclosure_store.invalidate(corp_code)
+
+        periodic_codes = sorted(new['stock_code'].unique())
+        if periodic_codes and self._on_change is not None:
+            try:
+                self._on_change(periodic_codes)
+            except Exception as e:
+                print(f"Disclosure poller callback error: {e}")
+
+        # 같은 날 재조회 시 중복 처리 방지: 마지막 접수일의 접수번호만 유지
+        last_dt = max(start, filings['rcept_dt'].astype(str).max())
+        self._save_state({
+            "last_dt": last_dt,
+            "seen": filings.loc[filings['rcept_dt'].astype(str) == last_dt, 'rcept_no'].tolist(),
+        })
+
+        self.last_poll = time.time()
+        if periodic_codes:
+            with self._lock:
+                self.version += 1
+            print(f"Disclosure poller: {len(periodic_codes)} periodic filers")
+        return periodic_codes
@@ -0,0 +1,161 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from api.dart_cache import CACHE_DIR
+from utils.atomic_io import write_json, write_parquet
+from utils.cache_policy import KST
+
+# 기업별 공시 목록 로컬 저장소 (parquet, 세션 간 공유)
+# - 마지막으로 저장된 접수일자(rcept_dt) 이후 공시만 추가 조회
+# - 요청 기간이 이미 확인한 구간(covered_from)보다 앞이면 그 구간만 추가 조회
+# - 최근 동기화 후 SYNC_INTERVAL 이내에는 네트워크 요청 없이 로컬에서 조회
+
+DISCLOSURE_DIR = os.path.join(CACHE_DIR, "disclosures")
+
+# 동기화 주기(초)
+SYNC_INTERVAL = 30 * 60
+
+COLUMNS = ['rcept_no', 'rcept_dt', 'report_nm', 'flr_nm']
+
+# 보고서 유형 필터 (보고서명 패턴)
+DISCLOSURE_TYPES = {
+    '정기공시': r'사업보고서|반기보고서|분기보고서',
+    '주요사항': r'주요사항보고서',
+    '지분공시': r'소유상황보고서|대량보유상황보고서|최대주주',
+    '실적/배당': r'영업\(잠정\)실적|매출액또는손익구조|현금ㆍ현물배당|배당',
+    '자기주식': r'자기주식',
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _path(corp_code):
+    return os.path.join(DISCLOSURE_DIR, f"{corp_code}.parquet")
+
+
+def _meta_path(corp_code):
+    return os.path.join(DISCLOSURE_DIR, f"{corp_code}.json")
+
+
+def _lock_for(corp_code):
+    with _locks_guard:
+        return _locks.setdefault(corp_code, threading.Lock())
+
+
+def _load_meta(corp_code):
+    path = _meta_path(corp_code)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def load(corp_code):
+    """저장된 공시 목록을 반환합니다 (접수일자 최신순). 없으면 빈 DataFrame."""
+    path = _path(corp_code)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"Disclosure store read error ({corp_code}): {e}")
+        return pd.DataFrame(columns=COLUMNS)
+
+
+def is_fresh(corp_code):
+    synced_at = _load_meta(corp_code).get("synced_at")
+    return synced_at is not None and time.time() - synced_at < SYNC_INTERVAL
+
+
+def invalidate(corp_code):
+    """다음 조회 시 동기화하도록 표시합니다 (저장된 목록과 확인 구간은 유지)."""
+    with _lock_for(corp_code):
+        meta = _load_meta(corp_code)
+        if meta.pop("synced_at", None) is None:
+            return
+        try:
+            write_json(_meta_path(corp_code), meta)
+        except Exception as e:
+            print(f"Disclosure store write error ({corp_code}): {e}")
+
+
+def sync(dart, corp_code, months=12):
+    """
+    최근 months개월을 포함하도록 저장소를 갱신하고 전체 목록을 반환합니다.
+    - 뒤쪽: 마지막 동기화 후 SYNC_INTERVAL이 지났으면 마지막 접수일자부터 오늘까지 조회
+    - 앞쪽: 요청 시작일이 이미 확인한 구간(covered_from)보다 앞이면 그 구간만 조회
+    조회 실패 시 기존 목록을 그대로 반환합니다.
+    """
+    with _lock_for(corp_code):
+        existing = load(corp_code)
+        meta = _load_meta(corp_code)
+        today = datetime.datetime.now(KST)
+        end = today.strftime("%Y%m%d")
+        start = (today - datetime.timedelta(days=30 * months)).strftime("%Y%m%d")
+
+        ranges = []
+        covered_from = meta.get("covered_from")
+        synced_at = meta.get("synced_at")
+        if covered_from is None:
+            # 처음 조회하는 기업 (확인 구간 기록 이전 저장분 포함): 요청 기간 전체
+            ranges.append((start, end))
+            covered_from, synced_at = start, None
+        else:
+            if start < covered_from:
+                # 공시가 없는 구간도 확인한 것으로 기록하여 반복 조회 방지
+                before = (datetime.datetime.strptime(covered_from, "%Y%m%d") - datetime.timedelta(days=1)).strftime("%Y%m%d")
+                ranges.append((start, before))
+                covered_from = start
+            if not is_fresh(corp_code):
+                # 마지막 접수일자 당일 공시부터 다시 조회 (접수번호로 중복 제거)
+                ranges.append((existing['rcept_dt'].max() if not existing.empty else covered_from, end))
+                synced_at = None
+
+        if not ranges:
+            return existing
+
+        frames = []
+        try:
+            for range_start, range_end in ranges:
+                frames.append(dart.list(corp_code, start=range_start, end=range_end))
+        except Exception as e:
+            print(f"Error syncing disclosures ({corp_code}): {e}")
+            return existing
+
+        fetched = [df.reindex(columns=COLUMNS).fillna('').astype(str) for df in frames if df is not None and not df.empty]
+        if fetched:
+            merged = pd.concat(fetched + [existing], ignore_index=True).drop_duplicates('rcept_no')
+            existing = merged.sort_values(['rcept_dt', 'rcept_no'], ascending=False).reset_index(drop=True)
+
+        try:
+            write_parquet(_path(corp_code), existing)
+            # 뒤쪽까지 조회했을 때만 동기화 시각 갱신
+            write_json(_meta_path(corp_code), {"covered_from": covered_from, "synced_at": synced_at or time.time()})
+        except Exception as e:
+            print(f"Disclosure store write error ({corp_code}): {e}")
+        return existing
+
+
+def query(disclosures, report_type=None, months=None, page=1, per_page=10):
+    """
+    공시 목록을 유형/기간으로 필터링하고 page번째 페이지를 반환합니다.
+    Returns: (page DataFrame, 필터링된 전체 건수)
+    """
+    df = disclosures
+    if months:
+        since = (datetime.datetime.now(KST) - datetime.timedelta(days=30 * months)).strftime("%Y%m%d")
+        df = df[df['rcept_dt'] >= since]
+    if report_type in DISCLOSURE_TYPES:
+        df = df[df['report_nm'].str.contains(DISCLOSURE_TYPES[report_type], regex=True)]
+
+    start = (max(page, 1) - 1) * per_page
+    return df.iloc[start:start + per_page], len(df)
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.rate_limiter import get_limiter, get_limiter_stats, backoff_delay
+
+try:
+    import aiohttp
+except ImportError:  # asyncio 크롤링 엔진 미사용 (스레드 엔진으로 대체)
+    aiohttp = None
+
+# 모든 스크래퍼(FnGuide, Naver)가 공유하는 HTTP 전송 계층
+# - Keep-Alive 세션 1개를 프로세스 전체에서 재사용 (TCP/TLS 핸드셰이크 절감)
+# - 호스트별 커넥션 풀 크기는 크롤링 worker 수에 맞춰 조정
+# - 호스트별 요청 수 / 지연시간 / 바이트 카운터 집계
+# - 호스트별 적응형 제한기(AIMD) + 지터 백오프 재시도 (api/rate_limiter.py)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Connection": "keep-alive",
+}
+
+DEFAULT_TIMEOUT = 5
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 2
+
+# 재시도하는 상태 코드
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 호스트 과부하 신호로 보고 공유 rate를 낮추는 상태 코드 (500 등 특정 페이지 오류는 제외)
+CONGESTION_STATUSES = {429, 503}
+
+_session = None
+_pool_size = DEFAULT_POOL_SIZE
+_session_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_host_stats = {}
+
+
+def _build_session(pool_size):
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    # pool_connections: 호스트 수, pool_maxsize: 호스트당 유지할 연결 수
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_pool(max_workers):
+    """
+    호스트별 커넥션 풀 크기를 worker 수에 맞춥니다.
+    현재 풀보다 큰 값이 들어오면 세션을 새로 구성합니다 (작아지는 경우는 유지).
+    기존 세션은 닫지 않습니다. 다른 스레드(뉴스 조회, 재수집 큐 등)가 진행 중인 요청은
+    기존 세션으로 완료되고, 참조가 없어지면 연결이 정리됩니다.
+    """
+    global _session, _pool_size
+    with _session_lock:
+        if max_workers <= _pool_size and _session is not None:
+            return
+        _pool_size = max(max_workers, _pool_size)
+        _session = _build_session(_pool_size)
+
+
+def get_session():
+    """공유 Keep-Alive 세션을 반환합니다 (최초 호출 시 생성)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(_pool_size)
+    return _session
+
+
+def record_request(host, elapsed, nbytes, ok=True):
+    """호스트별 요청 통계를 누적합니다."""
+    with _stats_lock:
+        stat = _host_stats.setdefault(host, {
+            "requests": 0,
+            "errors": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+            "bytes": 0,
+        })
+        stat["requests"] += 1
+        if not ok:
+            stat["errors"] += 1
+        stat["total_latency"] += elapsed
+        stat["max_latency"] = max(stat["max_latency"], elapsed)
+        stat["bytes"] += nbytes
+
+
+def fetch(url, headers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, **kwargs):
+    """
+    공유 세션으로 GET 요청을 보냅니다.
+    headers는 기본 헤더 위에 덮어씌워집니다.
+    호스트별 적응형 제한기를 거치며, 429/5xx/타임아웃은 지터 백오프 후 최대 retries회 재시도합니다.
+    공유 rate 감속은 429/503/타임아웃에서만, URL 재시도 1회 묶음당 한 번만 합니다.
+    재시도 후에도 실패한 네트워크 예외는 호출자에게 그대로 전달됩니다.
+    """
+    host = urlparse(url).netloc
+    limiter = get_limiter(host)
+    backed_off = False
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        started = time.perf_counter()
+        response = None
+        # 예상하지 못한 예외로 빠져나가도 슬롯은 반드시 반환 (제한기 조정 없이)
+        congested, healthy = False, False
+        try:
+            response = get_session().get(url, headers=headers, timeout=timeout, **kwargs)
+            congested = response.status_code in CONGESTION_STATUSES
+            healthy = response.status_code < 500
+        except (requests.Timeout, requests.ConnectionError):
+            congested = True
+            if attempt >= retries:
+                raise
+        finally:
+            elapsed = time.perf_counter() - started
+            throttled = congested and not backed_off
+            backed_off = backed_off or throttled
+            limiter.release(elapsed, throttled=throttled, healthy=healthy)
+            if response is None:
+                record_request(host, elapsed, 0, ok=False)
+
+        if response is None:
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        record_request(host, elapsed, len(response.content), ok=response.status_code < 400)
+
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            time.sleep(backoff_delay(attempt, retry_after=response.headers.get("Retry-After")))
+            continue
+        return response
+
+
+def create_async_session(max_connections):
+    """
+    asyncio 크롤링 엔진용 aiohttp 세션을 생성합니다.
+    이벤트 루프에 종속되므로 크롤링 1회(asyncio.run) 단위로 생성/종료합니다.
+    """
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=max_connections, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+
+
+async def fetch_async(session, url, headers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    aiohttp 세션으로 GET 요청을 보냅니다. 제한기/재시도/통계는 동기 fetch와 공유합니다.
+    Returns: (status_code, text, headers)
+    """
+    host = urlparse(url).netloc
+    limiter = get_limiter(host)
+    backed_off = False
+
+    for attempt in range(retries + 1):
+        await limiter.acquire_async()
+        started = time.perf_counter()
+        status = None
+        # 디코딩 오류, 크롤링 취소(CancelledError) 등으로 빠져나가도 슬롯은 반드시 반환
+        congested, healthy = False, False
+        try:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                status, response_headers = response.status, response.headers
+                congested = status in CONGESTION_STATUSES
+                healthy = status < 500
+                text = body.decode(response.get_encoding(), errors="replace")
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            congested = True
+            if attempt >= retries:
+                raise
+        finally:
+            elapsed = time.perf_counter() - started
+            throttled = congested and not backed_off
+            backed_off = backed_off or throttled
+            limiter.release(elapsed, throttled=throttled, healthy=healthy)
+            if status is None:
+                record_request(host, elapsed, 0, ok=False)
+
+        if status is None:
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        record_request(host, elapsed, len(body), ok=status < 400)
+
+        if status in RETRY_STATUSES and attempt < retries:
+            await asyncio.sleep(backoff_delay(attempt, retry_after=response_headers.get("Retry-After")))
+            continue
+        return status, text, response_headers
+
+
+def get_host_stats():
+    """
+    호스트별 요청 통계 스냅샷을 반환합니다.
+    Returns: {host: {requests, errors, avg_latency_ms, max_latency_ms, bytes,
+                     rate_per_sec, concurrency, in_flight, throttled}}
+    """
+    limiter_stats = get_limiter_stats()
+    with _stats_lock:
+        snapshot = {}
+        for host, stat in _host_stats.items():
+            count = stat["requests"]
+            snapshot[host] = {
+                "requests": count,
+                "errors": stat["errors"],
+                "avg_latency_ms": round(stat["total_latency"] / count * 1000, 1) if count else 0.0,
+                "max_latency_ms": round(stat["max_latency"] * 1000, 1),
+                "bytes": stat["bytes"],
+            }
+            snapshot[host].update(limiter_stats.get(host, {}))
+        return snapshot
+
+
+def reset_host_stats():
+    with _stats_lock:
+        _host_stats.clear()
@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+
+def _normalize(text):
+    return str(text).replace(" ", "").lower()
+
+
+def _grams(text):
+    # 2-gram (한 글자 검색어는 1-gram)
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class ListingIndex:
+    """
+    KRX 상장 종목 리스트 검색 인덱스 (상장 리스트 갱신 시 1회 생성)
+    - 종목코드 -> 행 (해시 조회)
+    - 정확한 종목명 -> 종목코드
+    - 종목명 2-gram 역색인 -> 부분 문자열 / 유사 이름 검색
+    """
+
+    def __init__(self, df_listing):
+        self.df = df_listing.reset_index(drop=True)
+        codes = self.df['Code'].tolist() if 'Code' in self.df.columns else []
+        names = self.df['Name'].tolist() if 'Name' in self.df.columns else []
+        marcaps = self.df['Marcap'].fillna(0).tolist() if 'Marcap' in self.df.columns else [0] * len(codes)
+
+        self._codes = codes
+        self._names = names
+        self._keys = [_normalize(name) for name in names]
+        self._marcaps = marcaps
+
+        self._by_code = {}
+        self._by_name = {}
+        self._postings = defaultdict(set)
+        for pos, (code, name, key) in enumerate(zip(codes, names, self._keys)):
+            self._by_code.setdefault(code, pos)
+            self._by_name.setdefault(name, pos)
+            for gram in _grams(key) | set(key):
+                self._postings[gram].add(pos)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def get(self, code):
+        """종목코드의 행(Series)을 반환합니다. 없으면 None."""
+        pos = self._by_code.get(code)
+        return None if pos is None else self.df.iloc[pos]
+
+    def name_of(self, code, default=None):
+        pos = self._by_code.get(code)
+        return default if pos is None else self._names[pos]
+
+    def code_for_name(self, name):
+        """정확히 일치하는 종목명의 종목코드. 없으면 None."""
+        pos = self._by_name.get(name)
+        return None if pos is None else self._codes[pos]
+
+    def _candidates(self, key):
+        grams = _grams(key)
+        postings = [self._postings.get(gram, set()) for gram in grams]
+        if not postings:
+            return set()
+        return set.intersection(*postings)
+
+    def contains(self, query, limit=None):
+        """
+        종목명에 검색어가 포함된 종목을 순위대로 반환합니다.
+        순위: 정확히 일치 > 앞부분 일치 > 짧은 이름 > 시가총액 큰 순
+        Returns: [(code, name), ...]
+        """
+        key = _normalize(query)
+        if not key:
+            return []
+        matches = [pos for pos in self._candidates(key) if key in self._keys[pos]]
+        matches.sort(key=lambda pos: (
+            self._keys[pos] != key,
+            not self._keys[pos].startswith(key),
+            len(self._keys[pos]),
+            -self._marcaps[pos],
+        ))
+        if limit is not None:
+            matches = matches[:limit]
+        return [(self._codes[pos], self._names[pos]) for pos in matches]
+
+    def suggest(self, query, limit=5):
+        """
+        부분 일치가 없을 때 2-gram이 많이 겹치는 유사 종목명을 추천합니다. (오타 대응)
+        Returns: [(code, name), ...]
+        """
+        grams = _grams(_normalize(query))
+        if not grams:
+            return []
+        scores = defaultdict(int)
+        for gram in grams:
+            for pos in self._postings.get(gram, ()):
+                scores[pos] += 1
+        # 검색어 2-gram의 절반 이상이 겹치는 이름만
+        threshold = max(1, (len(grams) + 1) // 2)
+        ranked = sorted(
+            (pos for pos, score in scores.items() if score >= threshold),
+            key=lambda pos: (-scores[pos], len(self._keys[pos]), -self._marcaps[pos]),
+        )
+        return [(self._codes[pos], self._names[pos]) for pos in ranked[:limit]]
@@ -1,37 +1,111 @@
 import FinanceDataReader as fdr
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
+import glob
+import os
+from datetime import datetime
+
+from api.listing_index import ListingIndex
+from api.price_store import get_bars
+from utils.atomic_io import write_parquet
+from utils.cache_policy import KST, get_cache_cutoff
+
+
+# 일별 KRX 상장 리스트 스냅샷 (parquet)
+# 상장 리스트는 장 마감 후에만 의미 있게 바뀌므로 16:00 KST 기준(utils/cache_policy)으로 유효성 판단
+LISTING_DIR = os.path.join("data", "krx_listing")
+LISTING_PREFIX = "krx_listing_"
+
+# 보관할 스냅샷 파일 수 (네트워크 실패 시 직전 스냅샷으로 대체)
+LISTING_KEEP = 2
+
+
+def _listing_files():
+    # 파일명 형식: krx_listing_YYYYMMDD_HHMMSS.parquet -> 이름순 = 시간순
+    return sorted(glob.glob(os.path.join(LISTING_DIR, f"{LISTING_PREFIX}*.parquet")))
+
+
+def _listing_file_time(path):
+    time_str = os.path.basename(path).replace(LISTING_PREFIX, "").replace(".parquet", "")
+    return datetime.strptime(time_str, "%Y%m%d_%H%M%S").replace(tzinfo=KST)
+
+
+def _load_listing_snapshot(valid_only=True):
+    """최신 상장 리스트 스냅샷을 로드합니다. valid_only면 16:00 기준 이후 파일만. 없으면 None."""
+    files = _listing_files()
+    if not files:
+        return None
+    latest = files[-1]
+    try:
+        if valid_only and _listing_file_time(latest) < get_cache_cutoff():
+            return None
+        return pd.read_parquet(latest)
+    except Exception as e:
+        print(f"Error loading KRX listing snapshot: {e}")
+        return None
+
+
+def _save_listing_snapshot(df):
+    now_str = datetime.now(KST).strftime("%Y%m%d_%H%M%S")
+    try:
+        write_parquet(os.path.join(LISTING_DIR, f"{LISTING_PREFIX}{now_str}.parquet"), df)
+        for old_file in _listing_files()[:-LISTING_KEEP]:
+            os.remove(old_file)
+    except Exception as e:
+        print(f"Error saving KRX listing snapshot: {e}")
+
+
+@st.cache_data(ttl=3600)
+def _get_krx_listing(cutoff_key):
+    # cutoff_key(16:00 기준 시각)가 바뀌면 새로 로드
+    df = _load_listing_snapshot()
+    if df is not None:
+        return df
+
+    try:
+        df = fdr.StockListing('KRX')
+        if not df.empty:
+            _save_listing_snapshot(df)
+            return df
+    except Exception as e:
+        print(f"Error fetching KRX listing: {e}")
+
+    # 네트워크 실패: 기준 시각 이전 스냅샷이라도 사용
+    df = _load_listing_snapshot(valid_only=False)
+    return df if df is not None else pd.DataFrame()
+
 
-@st.cache_data(ttl=3600) # 1시간 캐시
 def get_krx_listing():
     """
     KRX 전체 상장 종목 리스트를 가져옵니다 (캐싱됨).
     포함 정보: Code, Name, Market, Sector, Close, Marcap, Stocks, etc.
+    디스크 스냅샷이 16:00 KST 기준으로 유효하면 네트워크 요청 없이 로드합니다.
     """
-    try:
-        df = fdr.StockListing('KRX')
-        return df
-    except Exception as e:
-        print(f"Error fetching KRX listing: {e}")
-        return pd.DataFrame()
+    return _get_krx_listing(get_cache_cutoff().isoformat())
+
+
+@st.cache_resource(ttl=3600)
+def _get_listing_index(cutoff_key):
+    return ListingIndex(_get_krx_listing(cutoff_key))
+
+
+def get_listing_index():
+    """
+    KRX 상장 리스트 검색 인덱스 (종목코드/종목명 조회, 유사 이름 검색).
+    상장 리스트 스냅샷이 바뀔 때 1회 생성하여 세션 간 공유합니다.
+    """
+    return _get_listing_index(get_cache_cutoff().isoformat())
+
 
 def get_market_metrics(ticker):
     """
     특정 종목의 시가총액, 현재가, 주식수 등을 반환합니다.
     """
-    df_listing = get_krx_listing()
-    
-    if df_listing.empty:
+    # Ticker 검색 (인덱스 해시 조회)
+    row = get_listing_index().get(ticker)
+    if row is None:
         return None
     
-    # Ticker 검색
-    row = df_listing[df_listing['Code'] == ticker]
-    if row.empty:
-        return None
-    
-    row = row.iloc[0]
-    
     return {
         "Code": row['Code'],
         "Name": row['Name'],
@@ -46,13 +120,10 @@ def get_stock_history(code, days=365):
     """
     특정 종목의 일별 주가 데이터를 가져옵니다.
     기본값: 최근 1년 (365일)
+    종목별 로컬 일봉 저장소(api/price_store.py)에서 잘라 반환하며, 부족한 구간만 새로 조회합니다.
     """
     try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # FinanceDataReader format: fdr.DataReader(symbol, start, end)
-        df = fdr.DataReader(code, start_date, end_date)
+        df = get_bars(code, days)
         
         if df.empty:
             return pd.DataFrame()
@@ -60,7 +131,6 @@ def get_stock_history(code, days=365):
         # Index is Date, so reset index to make it a column
         df = df.reset_index()
         
-        # Ensure column names are standard (fdr usually returns Date, Open, High, Low, Close, Volume, Change)
         # We need Date, Open, High, Low, Close, Volume
         
         return df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].sort_values(by='Date', ascending=False)
@@ -68,4 +138,3 @@ def get_stock_history(code, days=365):
     except Exception as e:
         print(f"Error fetching stock history for {code}: {e}")
         return pd.DataFrame()
-
@@ -1,14 +1,15 @@
-import requests
 from bs4 import BeautifulSoup
 import urllib.parse
 
+from api.http_client import fetch
+
 def fetch_naver_news(code):
     """
     (Deprecated) 네이버 금융에서 해당 종목의 최신 뉴스를 가져옵니다.
     """
     try:
         url = f"https://finance.naver.com/item/news_news.naver?code={code}"
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=3)
+        response = fetch(url, timeout=3)
         
         if response.status_code != 200:
             return []
@@ -38,14 +39,13 @@ def fetch_naver_news_search(query):
         # Sort by date (sort=1) to get latest
         url = f"https://search.naver.com/search.naver?where=news&query={encoded_query}&sm=tab_opt&sort=1&photo=0&field=0&pd=0&ds=&de=&docid=&related=0&mynews=0&office_type=0&office_section_code=0&news_office_checked=&nso=so%3Add%2Cp%3Aall&is_sug_officeid=0"
         
+        # User-Agent / Accept-Language 는 공유 세션 기본 헤더 사용
         headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
             "Referer": "https://www.naver.com"
         }
         
-        response = requests.get(url, headers=headers, timeout=5)
+        response = fetch(url, headers=headers, timeout=5)
         if response.status_code != 200:
             return []
             
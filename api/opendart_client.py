@@ -1,22 +1,297 @@
 import OpenDartReader
 import pandas as pd
+import concurrent.futures
+import datetime
+import json
+import os
+import threading
+
+from api import disclosure_store
+from api.dart_cache import (
+    cached_finstate, cached_shareholders, get_finstate, get_shareholders, put_finstate, recent_report_periods,
+)
+from api.dart_quota import KeyPool, MeteredDart
+from utils.atomic_io import write_json
+from utils.single_flight import single_flight
+
+# 종목코드(6자리) -> DART 고유번호(8자리) 인덱스 (일 1회 갱신, 디스크에 보관)
+CORP_INDEX_FILE = os.path.join("data", "dart_corp_index.json")
+
+# 다중회사 주요계정 API 1회 요청당 최대 회사 수
+BULK_CHUNK_SIZE = 100
+
+# 관심 있는 계정명 리스트 (항목별 후보 계정명, 앞쪽이 우선)
+TARGET_ACCOUNTS = {
+    '자산총계': ['자산총계', '자산'],
+    '부채총계': ['부채총계', '부채'],
+    '자본총계': ['자본총계', '자본'],
+    '유동자산': ['유동자산'], 
+    '이익잉여금': ['이익잉여금', '미처분이익잉여금', '결손금', '미처리결손금', '이익잉여금(결손금)'], 
+    '현금성자산': ['현금및현금성자산', '현금 및 현금성자산', '현금', '현금성자산'],
+    '단기금융상품': ['단기금융상품', '유동금융자산', '기타유동금융자산', '단기매매증권', '단기투자자산', '금융기관예치금'],
+    '당기순이익': [
+        '당기순이익', '법인세비용차감전순이익', '연결당기순이익', '보통주당기순이익', '당기순손익', 
+        '지배기업소유주지분순이익', '지배기업의 소유주에게 귀속되는 당기순이익', '당기순이익(손실)', 
+        '분기순이익', '분기순이익(손실)', '반기순이익', '반기순이익(손실)', '지배기업의 소유주에게 귀속되는 분기순이익',
+        '지배기업의 소유주에게 귀속되는 반기순이익'
+    ] 
+}
+# Note: For Net Income, often '당기순이익' is the key. 
+# In 'CFS' (Consolidated), it is usually '당기순이익'.
+
+# 계정명 -> (항목, 우선순위) 매핑
+_ACCOUNT_ALIASES = pd.DataFrame(
+    [(name, key, rank) for key, names in TARGET_ACCOUNTS.items() for rank, name in enumerate(names)],
+    columns=['account_nm', 'account', 'rank'],
+)
+
+# 이력 조회 시 연도별로 반드시 채워야 하는 항목 (주요계정 API가 제공하는 항목만, 빠지면 해당 연도 보고서로 보충)
+HISTORY_REQUIRED_ACCOUNTS = ['자산총계', '부채총계', '자본총계', '유동자산', '이익잉여금', '당기순이익']
+
+# 최대주주 현황(hyslrSttus) 지분율 컬럼 (기말 소유주식 지분율, 주식 종류별 발행주식 기준)
+STAKE_COLUMN = 'trmend_posesn_stock_qota_rt'
+# 주식 종류별 합계 행의 성명
+TOTAL_ROW_NAMES = ['계', '합계']
+
+# 고유번호 목록 일일 갱신 실패 시 재시도 간격
+READER_RETRY_INTERVAL = datetime.timedelta(minutes=10)
+
+_index_lock = threading.Lock()
+_clients_lock = threading.Lock()
+_clients = {}
+
+
+def _load_corp_index():
+    if not os.path.exists(CORP_INDEX_FILE):
+        return {"updated": None, "corp_codes": {}, "corp_names": {}}
+    try:
+        with open(CORP_INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading corp index: {e}")
+        return {"updated": None, "corp_codes": {}, "corp_names": {}}
+
+
+# 프로세스 시작 시 1회 로드
+_corp_index = _load_corp_index()
+
+
+def refresh_corp_index(dart):
+    """
+    OpenDartReader가 보유한 고유번호 목록으로 인덱스를 갱신합니다. (오늘 이미 갱신했으면 생략)
+    """
+    global _corp_index
+    today = datetime.datetime.now().strftime("%Y%m%d")
+    if _corp_index.get("updated") == today:
+        return
+
+    with _index_lock:
+        if _corp_index.get("updated") == today:
+            return
+        try:
+            df = dart.corp_codes
+            df = df[df['stock_code'].astype(str).str.strip() != '']
+            index = {
+                "updated": today,
+                "corp_codes": dict(zip(df['stock_code'].str.strip(), df['corp_code'])),
+                "corp_names": dict(zip(df['stock_code'].str.strip(), df['corp_name'])),
+            }
+
+            write_json(CORP_INDEX_FILE, index, ensure_ascii=False)
+
+            _corp_index = index
+        except Exception as e:
+            print(f"Error refreshing corp index: {e}")
+
+
+def resolve_corp_code(stock_code):
+    """
+    종목코드를 DART 고유번호로 변환합니다. 인덱스에 없으면 입력값을 그대로 반환합니다.
+    (OpenDartReader는 고유번호를 받으면 전체 목록 검색을 생략함)
+    """
+    return _corp_index["corp_codes"].get(str(stock_code).strip(), stock_code)
+
+
+def _to_number(series):
+    return pd.to_numeric(series.astype(str).str.replace(',', '', regex=False).str.strip(), errors='coerce')
+
+
+def _first_number(data, columns):
+    # 앞쪽 컬럼부터 숫자로 변환 가능한 첫 값을 사용
+    value = pd.Series(float('nan'), index=data.index)
+    for col in columns:
+        if col in data.columns:
+            value = value.fillna(_to_number(data[col]))
+    return value
+
+
+def extract_accounts(finstate, key='stock_code', accumulated=False):
+    """
+    finstate 결과(단일 회사 또는 여러 회사를 쌓은 DataFrame)에서 TARGET_ACCOUNTS 항목을 한 번에 추출합니다.
+    - 회사(key)별 연결(CFS) 우선, 없으면 별도(OFS)
+    - 항목별 후보 계정명 중 우선순위가 가장 높은 계정 1개 선택
+    - accumulated=True(중간 보고서)면 당기 금액은 누적 금액(thstrm_add_amount) 우선
+    Returns: DataFrame [key, account, thstrm, frmtrm, bfefrmtrm] (금액은 숫자, 없으면 NaN)
+    """
+    columns = [key, 'account', 'thstrm', 'frmtrm', 'bfefrmtrm']
+    if finstate is None or finstate.empty or 'fs_div' not in finstate.columns:
+        return pd.DataFrame(columns=columns)
+
+    data = finstate.assign(**{key: finstate[key].fillna('') if key in finstate.columns else ''})
+
+    is_cfs = data['fs_div'].eq('CFS')
+    has_cfs = is_cfs.groupby(data[key]).transform('any')
+    data = data[is_cfs | (~has_cfs & data['fs_div'].eq('OFS'))]
+
+    data = data.merge(_ACCOUNT_ALIASES, on='account_nm')
+    data = data.sort_values('rank', kind='stable').drop_duplicates([key, 'account'])
+
+    current_cols = ['thstrm_add_amount', 'thstrm_amount'] if accumulated else ['thstrm_amount']
+    result = data[[key, 'account']].copy()
+    result['thstrm'] = _first_number(data, current_cols)
+    result['frmtrm'] = _first_number(data, ['frmtrm_amount', 'frmtrm_add_amount'])
+    result['bfefrmtrm'] = _first_number(data, ['bfefrmtrm_amount', 'bfefrmtrm_add_amount'])
+    return result.reset_index(drop=True)
+
+
+
+def aggregate_shareholders(shareholders, key='stock_code'):
+    """
+    최대주주 현황 응답(단일 회사 또는 여러 회사를 쌓은 DataFrame)에서 이름+관계별 지분율을 집계합니다. (벡터 연산)
+    응답에는 최대주주와 특수관계인만 들어 있으므로 합계 행만 제외합니다.
+    지분율은 주식 종류별 발행주식 기준이라 보통주(의결권) 행만 사용합니다.
+    Returns: DataFrame [key, nm, relate, stake] (회사별 지분율 내림차순)
+    """
+    columns = [key, 'nm', 'relate', 'stake']
+    if shareholders is None or shareholders.empty:
+        return pd.DataFrame(columns=columns)
+    # API 응답에 따라 컬럼명이 다를 수 있으므로 체크 (핵심 데이터 없음)
+    if STAKE_COLUMN not in shareholders.columns or 'relate' not in shareholders.columns or 'nm' not in shareholders.columns:
+        return pd.DataFrame(columns=columns)
+
+    data = pd.DataFrame({
+        key: shareholders[key] if key in shareholders.columns else '',
+        'nm': shareholders['nm'].astype(str).str.strip(),
+        'relate': shareholders['relate'].astype(str).str.strip(),
+        'stake': pd.to_numeric(
+            shareholders[STAKE_COLUMN].astype(str).str.replace(',', '', regex=False).str.replace('-', '', regex=False),
+            errors='coerce'
+        ).fillna(0.0),
+    })
+    common = shareholders['stock_knd'].astype(str).str.contains('보통') if 'stock_knd' in shareholders.columns else True
+    data = data[~data['nm'].isin(TOTAL_ROW_NAMES) & common]
+
+    grouped = data.groupby([key, 'nm', 'relate'], as_index=False)['stake'].sum()
+    grouped['stake'] = grouped['stake'].round(2)
+    return grouped.sort_values([key, 'stake'], ascending=[True, False]).reset_index(drop=True)
+
+def _disclosure_records(disclosures):
+    # Report URL: http://dart.fss.or.kr/dsaf001/main.do?rcpNo={rcept_no}
+    records = pd.DataFrame({
+        "title": disclosures['report_nm'],
+        "date": disclosures['rcept_dt'],
+        "url": "http://dart.fss.or.kr/dsaf001/main.do?rcpNo=" + disclosures['rcept_no'],
+        "submitter": disclosures['flr_nm'],
+    })
+    return records.to_dict('records')
+
+def get_opendart_client(api_key, extra_keys=None):
+    """
+    API Key별 프로세스 전역 OpenDartClient를 반환합니다 (스레드 안전).
+    초기화에 실패한 클라이언트는 다음 호출 시 다시 생성합니다.
+    extra_keys: 한도 소진 시 교체해 사용할 추가 API Key 목록 (최초 생성 시 적용)
+    고유번호 목록 다운로드(생성/일일 갱신)는 _clients_lock 밖에서 수행해 다른 키의 조회를 막지 않습니다.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+    if client is None or client.init_error:
+        # 같은 키의 동시 생성은 1회로 병합
+        return single_flight(api_key, None, "opendart_client", _create_client, api_key, extra_keys)
+    client.refresh_if_stale()
+    return client
+
+
+def _create_client(api_key, extra_keys):
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is not None and not client.init_error:
+            return client
+    client = OpenDartClient(api_key, extra_keys)
+    with _clients_lock:
+        _clients[api_key] = client
+    return client
+
 
 class OpenDartClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, extra_keys=None):
         self.api_key = api_key
         self.init_error = None
         self.dart = None
+        # 키별 일일 한도 집계 + 키 교체 (모든 DART 요청은 self.dart를 거침)
+        self.quota = KeyPool([api_key] + list(extra_keys or []))
+        # 마지막 get_bulk_financials에서 끝내 조회하지 못한 종목코드
+        self.last_bulk_failures = []
+        self.reader_date = None
+        self._refresh_retry_at = None
+        self._refresh_lock = threading.Lock()
         if api_key:
             try:
-                self.dart = OpenDartReader(api_key)
+                self._init_reader()
             except Exception as e:
                 self.init_error = str(e)
                 print(f"Error initializing OpenDartReader: {e}")
 
+    def _build_reader(self):
+        # OpenDartReader는 생성 시점의 고유번호 목록(일별 파일)을 계속 사용하므로 날짜가 바뀌면 다시 생성
+        dart = MeteredDart(OpenDartReader(self.api_key), self.quota)
+        refresh_corp_index(dart)
+        return dart
+
+    def _init_reader(self):
+        self.dart = self._build_reader()
+        self.reader_date = datetime.date.today()
+
+    def refresh_if_stale(self):
+        """
+        날짜가 바뀌었으면 OpenDartReader(고유번호 목록)와 종목코드 인덱스를 다시 만듭니다.
+        (프로세스가 며칠씩 실행되어도 신규 상장 기업을 찾을 수 있도록 일 1회 갱신, 실패 시 기존 리더 유지)
+        새 리더는 한 스레드만 만들고, 그동안 다른 스레드는 기존 리더를 그대로 사용합니다.
+        """
+        today = datetime.date.today()
+        if not self.dart or self.reader_date == today:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = datetime.datetime.now()
+            if self.reader_date == today or (self._refresh_retry_at is not None and now < self._refresh_retry_at):
+                return
+            try:
+                dart = self._build_reader()
+            except Exception as e:
+                self._refresh_retry_at = now + READER_RETRY_INTERVAL
+                print(f"Error refreshing OpenDartReader: {e}")
+                return
+            # 완성된 리더로 교체
+            self.dart = dart
+            self.reader_date = today
+            self._refresh_retry_at = None
+        finally:
+            self._refresh_lock.release()
+
+    def _fetch_finstate(self, corp_code, year, reprt_code):
+        # 재무제표 조회 (연결/별도 모두 포함, 실패 시 None)
+        try:
+            return cached_finstate(self.dart, corp_code, year, reprt_code)
+        except Exception as e:
+            print(f"Error fetching finstate ({corp_code}, {year}, {reprt_code}): {e}")
+            return None
+
     def get_financial_summary(self, corp_code, year, reprt_code=None):
         """
         특정 기업의 재무제표 주요 항목을 가져옵니다.
         reprt_code가 지정되지 않으면 연말(11011) -> 3분기(11014) -> 반기(11012) -> 1분기(11013) 순으로 조회합니다.
+        후보 보고서와 전년도 사업보고서는 동시에 요청하고, 우선순위가 가장 높은 결과를 사용합니다.
         """
         if not self.dart:
             return None
@@ -31,297 +306,297 @@ class OpenDartClient:
         used_reprt_code = None
 
         try:
-            for code in search_codes:
-                try:
-                    # 재무제표 조회 (연결 재무제표 우선, 없으면 별도)
-                    # fs_div: CFS(연결), OFS(별도)
-                    temp_finstate = self.dart.finstate(corp_code, year, reprt_code=code)
+            dart_code = resolve_corp_code(corp_code)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(search_codes) + 1) as executor:
+                futures = [executor.submit(self._fetch_finstate, dart_code, year, code) for code in search_codes]
+                # 중간 보고서가 선택될 경우에 대비해 전년도 사업보고서도 함께 요청
+                future_prev = None
+                if search_codes != ['11011']:
+                    future_prev = executor.submit(self._fetch_finstate, dart_code, year - 1, '11011')
+
+                for code, future in zip(search_codes, futures):
+                    temp_finstate = future.result()
                     if temp_finstate is not None and not temp_finstate.empty:
                         finstate = temp_finstate
                         used_reprt_code = code
                         break
-                except Exception:
-                    continue
-            
+
+                finstate_prev = future_prev.result() if future_prev is not None else None
+
             if finstate is None or finstate.empty:
                 return None
 
-            # 필요한 계정 항목 추출 로직
-            # OpenDart API는 계정명이 '자산총계', '자본총계' 등으로 나옴.
-            
-            # 관심 있는 계정명 리스트
-            target_accounts = {
-                '자산총계': ['자산총계', '자산'],
-                '부채총계': ['부채총계', '부채'],
-                '자본총계': ['자본총계', '자본'],
-                '유동자산': ['유동자산'], 
-                '이익잉여금': ['이익잉여금', '미처분이익잉여금', '결손금', '미처리결손금', '이익잉여금(결손금)'], 
-                '현금성자산': ['현금및현금성자산', '현금 및 현금성자산', '현금', '현금성자산'],
-                '단기금융상품': ['단기금융상품', '유동금융자산', '기타유동금융자산', '단기매매증권', '단기투자자산', '금융기관예치금'],
-                '당기순이익': [
-                    '당기순이익', '법인세비용차감전순이익', '연결당기순이익', '보통주당기순이익', '당기순손익', 
-                    '지배기업소유주지분순이익', '지배기업의 소유주에게 귀속되는 당기순이익', '당기순이익(손실)', 
-                    '분기순이익', '분기순이익(손실)', '반기순이익', '반기순이익(손실)', '지배기업의 소유주에게 귀속되는 분기순이익',
-                    '지배기업의 소유주에게 귀속되는 반기순이익'
-                ] 
-            }
-            # Note: For Net Income, often '당기순이익' is the key. 
-            # In 'CFS' (Consolidated), it is usually '당기순이익'.
-
-            
-            result = {}
-            
-            # 1. 메인 데이터프레임 선택 (연결 우선)
-            # CFS: 연결, OFS: 별도
-            df_main = finstate[finstate['fs_div'] == 'CFS']
-            if df_main.empty:
-                df_main = finstate[finstate['fs_div'] == 'OFS']
-                
-            if df_main.empty:
+            # 필요한 계정 항목 추출 (연결 우선, TARGET_ACCOUNTS 후보 순서)
+            # 중간 보고서는 당기 누적 금액 사용
+            if not finstate['fs_div'].isin(['CFS', 'OFS']).any():
                 return getattr(self, "_mock_fail_data", None)
 
-            # 2. 계정명 매핑을 위한 Lookup Dictionary 생성
-            # Main Report (Current Data)
-            account_map = df_main.set_index('account_nm').to_dict('index')
-
-            # Secondary Report (Historical Data) - If Main is NOT Annual
-            account_map_prev = {}
-            if used_reprt_code != '11011':
-                try:
-                    # Fetch Previous Year's Annual Report
-                    finstate_prev = self.dart.finstate(corp_code, year - 1, reprt_code='11011')
-                    if finstate_prev is not None and not finstate_prev.empty:
-                        # Prefer CFS, fallback to OFS
-                        df_prev = finstate_prev[finstate_prev['fs_div'] == 'CFS']
-                        if df_prev.empty:
-                            df_prev = finstate_prev[finstate_prev['fs_div'] == 'OFS']
-                        
-                        if not df_prev.empty:
-                            account_map_prev = df_prev.set_index('account_nm').to_dict('index')
-                except Exception as e:
-                    print(f"Error fetching historical annual report: {e}")
-
-            result = {}
-
-            # 3. 데이터 추출 함수 (Map 기반)
-            def get_values_from_map(target_names):
-                # Search Priority: Try to find any matching name in current map first
-                matched_name_current = None
-                for name in target_names:
-                    if name in account_map:
-                        matched_name_current = name
-                        break
-                
-                # Try to find match in prev map
-                matched_name_prev = None
-                if account_map_prev:
-                    for name in target_names:
-                        if name in account_map_prev:
-                            matched_name_prev = name
-                            break
-                
-                vals = [0, 0, 0] # [Current, Prev, PrevPrev]
-
-                # --- 1. Current Year Value ---
-                if matched_name_current:
-                    row_data = account_map[matched_name_current]
-                    
-                    # Accumulation Logic for Interim
-                    val_current_str = None
-                    if used_reprt_code != '11011': 
-                         val_current_str = row_data.get('thstrm_add_amount')
-                    
-                    if not val_current_str or pd.isna(val_current_str) or str(val_current_str).strip() == '':
-                        val_current_str = row_data.get('thstrm_amount', '0')
-                        
-                    try:
-                        vals[0] = int(str(val_current_str).replace(',', ''))
-                    except:
-                        vals[0] = 0
-                
-                # --- 2. Historical Values (Prev, PrevPrev) ---
-                if used_reprt_code != '11011' and matched_name_prev:
-                    # If we have a Previous Annual Report, use it for Year-1 and Year-2
-                    row_data_prev = account_map_prev[matched_name_prev]
-                    
-                    # Year-1 (thstrm_amount of Prev Annual)
-                    try:
-                        t_val = row_data_prev.get('thstrm_amount', '0')
-                        vals[1] = int(str(t_val).replace(',', ''))
-                    except:
-                        vals[1] = 0
-                        
-                    # Year-2 (frmtrm_amount of Prev Annual)
-                    try:
-                        f_val = row_data_prev.get('frmtrm_amount', '0')
-                        vals[2] = int(str(f_val).replace(',', ''))
-                    except:
-                        vals[2] = 0
-                        
-                elif matched_name_current:
-                    # Fallback: Use columns from Current Report (Standard Logic)
-                    row_data = account_map[matched_name_current]
-                    
-                    # Year-1
-                    cols_y1 = ['frmtrm_amount', 'frmtrm_add_amount'] # Fallback
-                    for c in cols_y1:
-                        try:
-                            v = row_data.get(c, '0')
-                            if v and not pd.isna(v):
-                                vals[1] = int(str(v).replace(',', ''))
-                                break
-                        except: pass
-                        
-                    # Year-2
-                    cols_y2 = ['bfefrmtrm_amount', 'bfefrmtrm_add_amount']
-                    for c in cols_y2:
-                        try:
-                            v = row_data.get(c, '0')
-                            if v and not pd.isna(v):
-                                vals[2] = int(str(v).replace(',', ''))
-                                break
-                        except: pass
-
-                return vals
-
-            for key, names in target_accounts.items():
-                result[key] = get_values_from_map(names)
+            current = extract_accounts(finstate, accumulated=used_reprt_code != '11011')
 
-            return result
+            summary = current.set_index('account').reindex(list(TARGET_ACCOUNTS))[['thstrm', 'frmtrm', 'bfefrmtrm']]
+
+            # 중간 보고서인 경우 전년도(Year-1), 전전년도(Year-2)는 전년도 사업보고서 값 사용
+            if used_reprt_code != '11011' and finstate_prev is not None and not finstate_prev.empty:
+                prev = extract_accounts(finstate_prev).set_index('account')
+                has_prev = summary.index.isin(prev.index)
+                summary.loc[has_prev, ['frmtrm', 'bfefrmtrm']] = prev.loc[summary.index[has_prev], ['thstrm', 'frmtrm']].to_numpy()
+
+            # [Current, Prev, PrevPrev], 값이 없으면 0
+            summary = summary.fillna(0).astype('int64')
+            return {key: vals for key, vals in zip(summary.index, summary.values.tolist())}
 
         except Exception as e:
             print(f"Error fetching financial data: {e}")
             return None
 
+    def get_financial_history(self, corp_code, base_year, years=10):
+        """
+        사업보고서(11011) 기준으로 base_year부터 과거 years개 연도의 주요 계정 이력을 조회합니다.
+        보고서 1건에 당기/전기/전전기 3개 연도가 들어 있으므로 base_year, base_year-3, ... 보고서만 병렬 조회하고,
+        필수 항목(HISTORY_REQUIRED_ACCOUNTS) 중 하나라도 빠진 연도는 해당 연도 보고서로 한 번 더 보충합니다.
+        (빈 칸만 셀 단위로 채움, 보고서별 응답은 finstate 캐시 사용)
+        Returns: DataFrame (index=year 오름차순, columns=TARGET_ACCOUNTS 항목, 단위: 원, 값이 없으면 NaN)
+        """
+        target_years = list(range(base_year - years + 1, base_year + 1))
+        history = pd.DataFrame(index=pd.Index(target_years, name='year'), columns=list(TARGET_ACCOUNTS), dtype='float64')
+        if not self.dart or not target_years:
+            return history
+
+        dart_code = resolve_corp_code(corp_code)
+        fetched = set()
+
+        def collect(report_years):
+            report_years = [y for y in report_years if y not in fetched]
+            if not report_years:
+                return history
+            fetched.update(report_years)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(report_years))) as executor:
+                reports = list(executor.map(lambda y: self._fetch_finstate(dart_code, y, '11011'), report_years))
+
+            # 최신 보고서 값 우선 (정정/재작성된 과거 수치 반영), 빈 칸만 셀 단위로 채움
+            merged = history
+            for report_year, finstate in sorted(zip(report_years, reports), key=lambda item: item[0], reverse=True):
+                accounts = extract_accounts(finstate).set_index('account')
+                periods = {col: report_year - offset for offset, col in enumerate(['thstrm', 'frmtrm', 'bfefrmtrm'])}
+                values = accounts[list(periods)].rename(columns=periods).T.reindex(columns=history.columns).astype('float64')
+                merged = merged.combine_first(values.loc[values.index.isin(history.index)])
+            return merged.reindex(columns=history.columns)
+
+        history = collect(range(base_year, base_year - years, -3))
+        history = collect([year for year in target_years if history.loc[year, HISTORY_REQUIRED_ACCOUNTS].isna().any()])
+        return history
+
+    def is_quota_exhausted(self):
+        return self.quota.remaining() == 0
+
+    def estimate_bulk_cost(self, stock_codes, year, reprt_code='11011'):
+        """get_bulk_financials 실행에 필요한 DART 요청 수 (캐시에 없는 기업만 계산)"""
+        missing = [code for code in stock_codes if get_finstate(resolve_corp_code(code), year, reprt_code) is None]
+        return (len(missing) + BULK_CHUNK_SIZE - 1) // BULK_CHUNK_SIZE
+
+    def get_bulk_financials(self, stock_codes, year, reprt_code='11011'):
+        """
+        여러 기업의 주요 계정을 다중회사 주요계정 API로 일괄 조회합니다. (BULK_CHUNK_SIZE개씩 요청)
+        회사별 응답은 finstate 캐시에 저장되어 get_financial_summary와 공유됩니다.
+        계정 선택 규칙(연결 우선, TARGET_ACCOUNTS 후보 순서)은 get_financial_summary와 같습니다.
+        요청이 실패한 묶음은 반으로 나눠 다시 요청하고, 끝까지 실패한 종목은 캐시하지 않고
+        self.last_bulk_failures와 결과의 attrs['failed_codes']에 남깁니다.
+        Returns: DataFrame [stock_code, account, year, amount] (long format)
+        """
+        columns = ['stock_code', 'account', 'year', 'amount']
+        self.last_bulk_failures = []
+        if not self.dart or not stock_codes:
+            return pd.DataFrame(columns=columns)
+
+        # 중간에 한도가 소진되어 일부만 수집되지 않도록 시작 전에 잔여 한도 확인
+        cost = self.estimate_bulk_cost(stock_codes, year, reprt_code)
+        if not self.quota.can_afford(cost):
+            print(f"Not enough DART quota for bulk fetch (need {cost}, remaining {self.quota.remaining()})")
+            return pd.DataFrame(columns=columns)
+
+        corp_to_stock = {resolve_corp_code(code): code for code in stock_codes}
+        frames = []
+        missing = []
+        for corp_code, stock_code in corp_to_stock.items():
+            cached = get_finstate(corp_code, year, reprt_code)
+            if cached is None:
+                missing.append(corp_code)
+            elif not cached.empty:
+                frames.append(cached.assign(stock_code=stock_code))
+
+        failed = []
+        for i in range(0, len(missing), BULK_CHUNK_SIZE):
+            chunk = missing[i:i + BULK_CHUNK_SIZE]
+            for fetched, df in self._fetch_bulk_chunk(chunk, year, reprt_code, failed):
+                groups = {}
+                if df is not None and not df.empty and 'stock_code' in df.columns:
+                    groups = dict(list(df.groupby(df['stock_code'].astype(str).str.strip())))
+
+                for corp_code in fetched:
+                    stock_code = corp_to_stock[corp_code]
+                    group = groups.get(stock_code, pd.DataFrame())
+                    put_finstate(corp_code, year, reprt_code, group)
+                    if not group.empty:
+                        frames.append(group.assign(stock_code=stock_code))
+
+        self.last_bulk_failures = [corp_to_stock[corp_code] for corp_code in failed]
+        if self.last_bulk_failures:
+            print(f"Bulk finstate failed for {len(self.last_bulk_failures)} codes: {', '.join(self.last_bulk_failures)}")
+
+        if not frames:
+            result = pd.DataFrame(columns=columns)
+            result.attrs['failed_codes'] = self.last_bulk_failures
+            return result
+
+        accounts = extract_accounts(pd.concat(frames, ignore_index=True), accumulated=reprt_code != '11011')
+
+        periods = {'thstrm': year, 'frmtrm': year - 1, 'bfefrmtrm': year - 2}
+        long_df = accounts.melt(id_vars=['stock_code', 'account'], value_vars=list(periods), var_name='period', value_name='amount')
+        long_df['year'] = long_df['period'].map(periods)
+
+        long_df = long_df.dropna(subset=['amount'])
+        result = long_df[columns].sort_values(['stock_code', 'account', 'year']).reset_index(drop=True)
+        result.attrs['failed_codes'] = self.last_bulk_failures
+        return result
+
+    def _fetch_bulk_chunk(self, chunk, year, reprt_code, failed):
+        """
+        고유번호 묶음을 한 번에 조회하고 [(조회된 고유번호 목록, 응답 DataFrame)]을 반환합니다.
+        요청이 실패하면 반씩 나눠 재요청하며(1개까지), 끝내 실패한 고유번호는 failed에 추가합니다.
+        """
+        try:
+            # 쉼표로 연결된 고유번호 -> 다중회사 주요계정(fnlttMultiAcnt) 조회
+            df = self.dart.finstate(','.join(chunk), year, reprt_code=reprt_code)
+        except Exception as e:
+            print(f"Error fetching bulk finstate ({len(chunk)} corps): {e}")
+            # 한도 소진 등 나눠도 해결되지 않는 경우는 재요청하지 않음
+            if len(chunk) == 1 or not self.quota.can_afford(2):
+                failed.extend(chunk)
+                return []
+            mid = len(chunk) // 2
+            return (self._fetch_bulk_chunk(chunk[:mid], year, reprt_code, failed)
+                    + self._fetch_bulk_chunk(chunk[mid:], year, reprt_code, failed))
+        return [(chunk, df)]
+
     def get_corp_name(self, corp_code):
         if not self.dart: 
             return corp_code
         try:
-            return corp_code 
+            return _corp_index["corp_names"].get(corp_code, corp_code)
         except:
             return corp_code
 
     def get_major_shareholders(self, corp_code):
         """
         최대주주 및 특수관계인 지분율을 가져옵니다.
-        '본인' 또는 '최대주주의 특수관계인'만 필터링하여 
-        보통주/우선주 합산 지분율 상위 5명 반환.
+        최근 정기보고서의 최대주주 현황에서 보통주 지분율 상위 5명 반환.
         """
         if not self.dart:
             return []
 
         try:
-            # OpenDartReader: major_shareholders(corp_code)
-            # API: /api/major_shareholders.json (사업보고서 내 최대주주 현황)
-            df = self.dart.major_shareholders(corp_code)
-            
-            if df is None or df.empty:
-                return []
-            
-            # --- 1. 컬럼 확인 및 정제 ---
-            # 필요한 컬럼: nm(성명), relate(관계), stock_knd(주식종류), 
-            # 주식수 또는 지분율 컬럼: trmend_possession_stock_qota_rt (기말소유주식지분율)
-            # trmend_possession_stock_co (기말소유주식수) - for checking
-            
-            # API 응답에 따라 컬럼명이 다를 수 있으므로 체크 (주요 패턴)
-            # 보통 'trmend_possession_stock_qota_rt' 가 지분율
-            
-            target_col = 'trmend_possession_stock_qota_rt'
-            if target_col not in df.columns:
-                return [] # 핵심 데이터 없음
-
-            if 'relate' not in df.columns or 'nm' not in df.columns:
-                return []
+            # OpenDartReader: report(corp_code, '최대주주', bsns_year, reprt_code)
+            # API: /api/hyslrSttus.json (정기보고서 내 최대주주 현황), 보고서별 캐시
+            df = self._load_shareholders(resolve_corp_code(corp_code))
 
-            # --- 2. 필터링 (관계) ---
-            target_rels = ['본인', '최대주주의 특수관계인']
-            # 데이터 정제: 공백 제거
-            df['relate'] = df['relate'].astype(str).str.strip()
-            df['nm'] = df['nm'].astype(str).str.strip()
-            
-            # 검색
-            filtered_df = df[df['relate'].isin(target_rels)].copy()
-            
-            if filtered_df.empty:
-                return []
+            # 지분율 내림차순 상위 5명
+            top_5 = aggregate_shareholders(df).head(5)
 
-            # --- 3. 지분율 수치 변환 ---
-            def clean_float(x):
-                try:
-                    return float(str(x).replace(',', '').replace('-', ''))
-                except:
-                    return 0.0
-            
-            filtered_df['stake_val'] = filtered_df[target_col].apply(clean_float)
-            
-            # --- 4. 합산 로직 (이름 + 관계 기준) ---
-            # 보통 주식 종류(stock_knd)가 '보통주', '우선주' 등으로 나뉘어 들어옴.
-            # 이를 구분하지 않고 '이름'과 '관계'가 같으면 지분율을 단순 합산한다.
-            # (총 발행 주식수 기준 지분율이므로 단순 합산 가능)
-            
-            # Group by Name and Relation
-            grouped_df = filtered_df.groupby(['nm', 'relate'])['stake_val'].sum().reset_index()
-            
-            # 소수점 처리 (깔끔하게)
-            grouped_df['stake_val'] = grouped_df['stake_val'].round(2)
-            
-            # --- 5. 순위 선정 (상위 5명) ---
-            # 지분율 내림차순
-            grouped_df = grouped_df.sort_values(by='stake_val', ascending=False)
-            top_5 = grouped_df.head(5)
-            
-            # --- 6. 결과 반환 ---
-            result = []
-            for _, row in top_5.iterrows():
-                result.append({
-                    "성명": row['nm'],
-                    "관계": row['relate'],
-                    "총지분율": f"{row['stake_val']}%" # 문자열 포맷팅
-                })
-                
-            return result
+            return [
+                {"성명": nm, "관계": relate, "총지분율": f"{stake}%"} # 문자열 포맷팅
+                for nm, relate, stake in zip(top_5['nm'], top_5['relate'], top_5['stake'])
+            ]
 
         except Exception as e:
             print(f"Error fetching shareholders: {e}")
             return []
 
+    def estimate_shareholder_cost(self, stock_codes):
+        """get_bulk_shareholders 실행에 필요한 최대 DART 요청 수 (캐시에 없는 보고서만 계산)"""
+        cost = 0
+        for code in stock_codes:
+            dart_code = resolve_corp_code(code)
+            for year, reprt_code in recent_report_periods():
+                cached = get_shareholders(dart_code, year, reprt_code)
+                if cached is None:
+                    cost += 1
+                elif not cached.empty:
+                    break
+        return cost
+
+    def get_bulk_shareholders(self, stock_codes, max_workers=8):
+        """
+        여러 기업의 최대주주/특수관계인 지분을 병렬로 조회합니다. (기업별 응답은 보고서별 캐시 사용)
+        잔여 한도가 부족하면 조회하지 않고 빈 결과를 반환합니다.
+        Returns: DataFrame [stock_code, nm, relate, stake] (long format, stake: % 수치)
+        """
+        if not self.dart or not stock_codes:
+            return aggregate_shareholders(None)
+
+        # 중간에 한도가 소진되어 일부만 수집되지 않도록 시작 전에 잔여 한도 확인
+        cost = self.estimate_shareholder_cost(stock_codes)
+        if not self.quota.can_afford(cost):
+            print(f"Not enough DART quota for shareholder fetch (need {cost}, remaining {self.quota.remaining()})")
+            return aggregate_shareholders(None)
+
+        def load(code):
+            try:
+                return self._load_shareholders(resolve_corp_code(code)).assign(stock_code=code)
+            except Exception as e:
+                print(f"Error fetching shareholders ({code}): {e}")
+                return None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = [df for df in executor.map(load, stock_codes) if df is not None and not df.empty]
+
+        if not frames:
+            return aggregate_shareholders(None)
+        return aggregate_shareholders(pd.concat(frames, ignore_index=True))
+
+    def _load_shareholders(self, dart_code):
+        # 최근 분기 보고서가 아직 제출 전(빈 응답)이면 직전 정기보고서 사용
+        df = pd.DataFrame()
+        for year, reprt_code in recent_report_periods():
+            df = cached_shareholders(self.dart, dart_code, year, reprt_code)
+            if not df.empty:
+                break
+        return df
+
+    def sync_disclosures(self, corp_code, months=12):
+        """
+        공시 저장소를 최신 상태로 맞추고 전체 목록을 반환합니다. (신규 공시만 조회, 최근 동기화 시 로컬 조회)
+        """
+        dart_code = resolve_corp_code(corp_code)
+        if not self.dart:
+            return disclosure_store.load(dart_code)
+        return disclosure_store.sync(self.dart, dart_code, months)
+
+    def get_disclosure_page(self, corp_code, report_type=None, months=12, page=1, per_page=10):
+        """
+        최근 n개월 공시를 보고서 유형(disclosure_store.DISCLOSURE_TYPES)으로 필터링하여 페이지 단위로 반환합니다.
+        Returns: (list of {title, date, url, submitter}, 필터링된 전체 건수)
+        """
+        try:
+            disclosures = self.sync_disclosures(corp_code, months)
+            page_df, total = disclosure_store.query(disclosures, report_type, months, page, per_page)
+            return _disclosure_records(page_df), total
+        except Exception as e:
+            print(f"Error fetching disclosures: {e}")
+            return [], 0
+
     def get_disclosure_list(self, corp_code, months=6):
         """
         최근 n개월간의 공시 목록을 가져옵니다.
         """
         if not self.dart:
             return []
-            
+
         try:
-            from datetime import datetime, timedelta
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=30*months)
-            
-            # YYYYMMDD string format
-            start_str = start_date.strftime("%Y%m%d")
-            end_str = end_date.strftime("%Y%m%d")
-            
-            # Fetch list
-            disc_list = self.dart.list(corp_code, start=start_str, end=end_str)
-            
-            if disc_list is None or disc_list.empty:
-                return []
-            
-            # Select relevant columns: report_nm, rcept_no, rcept_dt
-            # Map to list of dicts
-            results = []
-            for _, row in disc_list.iterrows():
-                # Report URL: http://dart.fss.or.kr/dsaf001/main.do?rcpNo={rcept_no}
-                url = f"http://dart.fss.or.kr/dsaf001/main.do?rcpNo={row['rcept_no']}"
-                results.append({
-                    "title": row['report_nm'],
-                    "date": row['rcept_dt'],
-                    "url": url,
-                    "submitter": row.get('flr_nm', '')
-                })
-                
-            return results # Return all fetched results
-            
+            disclosures = self.sync_disclosures(corp_code, months)
+            page_df, _ = disclosure_store.query(disclosures, months=months, per_page=len(disclosures))
+            return _disclosure_records(page_df) # Return all fetched results
+
         except Exception as e:
             print(f"Error fetching disclosures: {e}")
             return []
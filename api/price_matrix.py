@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from api.price_store import prefetch_bars
+from utils.atomic_io import write_json
+
+# 대상 종목 전체의 날짜 x 종목 가격 행렬 (numpy memmap)
+# - 모든 종목을 같은 거래일 축(합집합)에 정렬, 거래가 없는 칸은 NaN
+# - 필드별 float64 행렬을 디스크에 저장하고 memmap으로 열어 전체 종목 통계를 벡터 연산으로 계산
+
+MATRIX_DIR = os.path.join("data", "price_matrix")
+CURRENT_FILE = os.path.join(MATRIX_DIR, "current.json")
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 연간 거래일 수 (52주)
+TRADING_DAYS = 252
+
+_cache_lock = threading.Lock()
+_cached = None
+
+
+def _field_path(directory, field):
+    return os.path.join(directory, f"{field.lower()}.f8")
+
+
+def build_price_matrix(bars_by_code):
+    """
+    종목별 일봉(dict: code -> DataFrame, index=Date)으로 가격 행렬을 만들어 저장합니다.
+    새 행렬은 별도 폴더에 쓴 뒤 current.json을 교체하므로 읽는 중인 기존 행렬은 깨지지 않습니다.
+    Returns: PriceMatrix (저장할 종목이 없으면 None)
+    """
+    bars_by_code = {code: bars for code, bars in bars_by_code.items() if bars is not None and not bars.empty}
+    if not bars_by_code:
+        return None
+
+    codes = sorted(bars_by_code)
+    dates = pd.DatetimeIndex(sorted(set().union(*(bars.index for bars in bars_by_code.values()))))
+
+    # 빌드마다 새 폴더에 쓰고 current.json만 교체 -> 읽는 중인(memmap으로 열린) 기존 행렬은 그대로 유지
+    built_at = time.time()
+    build_name = f"build_{int(built_at * 1000)}"
+    build_dir = os.path.join(MATRIX_DIR, build_name)
+    os.makedirs(build_dir, exist_ok=True)
+    try:
+        for field in FIELDS:
+            matrix = np.memmap(_field_path(build_dir, field), dtype='float64', mode='w+', shape=(len(dates), len(codes)))
+            matrix[:] = np.nan
+            for col, code in enumerate(codes):
+                bars = bars_by_code[code]
+                if field in bars.columns:
+                    matrix[:, col] = pd.to_numeric(bars[field], errors='coerce').reindex(dates).to_numpy(dtype='float64')
+            matrix.flush()
+            del matrix
+
+        np.save(os.path.join(build_dir, "dates.npy"), dates.values.astype('datetime64[D]'))
+
+        write_json(CURRENT_FILE, {"build": build_name, "codes": codes, "rows": len(dates), "built_at": built_at})
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    # 이전 빌드 정리 (다른 프로세스가 열고 있으면 다음 빌드 때 다시 시도)
+    for name in os.listdir(MATRIX_DIR):
+        if name.startswith("build_") and name != build_name:
+            shutil.rmtree(os.path.join(MATRIX_DIR, name), ignore_errors=True)
+
+    return load_price_matrix()
+
+
+def build_from_store(codes, days=400):
+    """가격 저장소(api/price_store.py)의 일봉으로 행렬을 빌드합니다. (저장소에 부족한 구간은 동시 조회)"""
+    return build_price_matrix(prefetch_bars(codes, days))
+
+
+def load_price_matrix():
+    """저장된 가격 행렬을 엽니다 (재빌드되면 다시 염). 없으면 None."""
+    global _cached
+    if not os.path.exists(CURRENT_FILE):
+        return None
+    try:
+        with open(CURRENT_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception as e:
+        print(f"Price matrix load error: {e}")
+        return None
+
+    with _cache_lock:
+        if _cached is None or _cached.built_at != meta["built_at"]:
+            _cached = PriceMatrix(os.path.join(MATRIX_DIR, meta["build"]), meta)
+        return _cached
+
+
+class PriceMatrix:
+    """
+    memmap 가격 행렬과 전체 종목 벡터 통계.
+    field(name): (날짜 x 종목) 행렬, 결측은 NaN
+    """
+
+    def __init__(self, directory, meta):
+        self.codes = meta["codes"]
+        self.dates = np.load(os.path.join(directory, "dates.npy"))
+        self.built_at = meta["built_at"]
+        self._col = {code: i for i, code in enumerate(self.codes)}
+        shape = (meta["rows"], len(self.codes))
+        self._fields = {
+            field: np.memmap(_field_path(directory, field), dtype='float64', mode='r', shape=shape)
+            for field in FIELDS
+        }
+
+    def field(self, name):
+        return self._fields[name]
+
+    def mask(self, name='Close'):
+        """값이 있는 칸 (거래일 정렬 후 해당 종목의 데이터가 있는지)"""
+        return ~np.isnan(self._fields[name])
+
+    def series(self, code, name='Close'):
+        col = self._col.get(code)
+        if col is None:
+            return pd.Series(dtype='float64')
+        return pd.Series(self._fields[name][:, col], index=pd.DatetimeIndex(self.dates)).dropna()
+
+    def _last_valid(self, matrix):
+        # 종목별 마지막 유효값 (거래정지 등으로 마지막 행이 NaN인 경우 대비)
+        valid = ~np.isnan(matrix)
+        last_idx = matrix.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        values = matrix[last_idx, np.arange(matrix.shape[1])]
+        return np.where(valid.any(axis=0), values, np.nan)
+
+    def pct_from_high(self, window=TRADING_DAYS):
+        """최근 window 거래일 고가(종가 기준) 대비 현재가 위치 (%, 0 = 고점)"""
+        close = self._fields['Close'][-window:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            high = np.where(np.isnan(close), -np.inf, close).max(axis=0)
+            high = np.where(np.isfinite(high), high, np.nan)
+            return (self._last_valid(close) / high - 1) * 100
+
+    def returns(self, periods):
+        """periods 거래일 전 대비 수익률 (%)"""
+        close = self._fields['Close']
+        if close.shape[0] <= periods:
+            return np.full(close.shape[1], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self._last_valid(close) / self._last_valid(close[:-periods]) - 1) * 100
+
+    def volatility(self, window=60):
+        """최근 window 거래일 일간 로그수익률의 연율화 표준편차 (%)"""
+        close = self._fields['Close'][-(window + 1):]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_ret = np.diff(np.log(close), axis=0)
+            counts = (~np.isnan(log_ret)).sum(axis=0)
+            mean = np.nansum(log_ret, axis=0) / np.maximum(counts, 1)
+            var = np.nansum((log_ret - mean) ** 2, axis=0) / np.maximum(counts - 1, 1)
+            return np.where(counts > 1, np.sqrt(var * TRADING_DAYS) * 100, np.nan)
+
+    def avg_volume(self, window=20):
+        volume = self._fields['Volume'][-window:]
+        counts = (~np.isnan(volume)).sum(axis=0)
+        return np.where(counts > 0, np.nansum(volume, axis=0) / np.maximum(counts, 1), np.nan)
+
+    def summary(self):
+        """
+        전체 종목 가격 통계 (index=종목코드)
+        columns: 52주고점대비(%), 1개월수익률(%), 3개월수익률(%), 변동성(%), 평균거래량(20일)
+        """
+        return pd.DataFrame({
+            "52주고점대비(%)": self.pct_from_high(),
+            "1개월수익률(%)": self.returns(21),
+            "3개월수익률(%)": self.returns(63),
+            "변동성(%)": self.volatility(),
+            "평균거래량(20일)": self.avg_volume(),
+        }, index=pd.Index(self.codes, name="종목코드")).round(2)
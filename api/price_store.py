@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import FinanceDataReader as fdr
+import pandas as pd
+
+from utils.atomic_io import write_json, write_parquet
+from utils.cache_policy import KST, get_cache_cutoff
+
+# 종목별 일봉(OHLCV) 로컬 저장소 (parquet)
+# - 저장된 마지막 날짜 이후의 거래일만 추가 조회, 더 긴 기간 요청 시 앞쪽만 보충 조회
+# - 마지막 동기화가 16:00 KST 기준 이후면 네트워크 요청 없이 저장분을 잘라서 반환
+
+PRICE_DIR = os.path.join("data", "price_history")
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 일괄 조회 동시 요청 수
+PREFETCH_WORKERS = 8
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+# 백그라운드 선조회 현황: code -> (cutoff, days) / 진행 중인 종목
+_prefetched = {}
+_in_flight = set()
+_prefetch_guard = threading.Lock()
+
+
+def _lock_for(code):
+    with _locks_guard:
+        return _locks.setdefault(code, threading.Lock())
+
+
+def _bars_path(code):
+    return os.path.join(PRICE_DIR, f"{code}.parquet")
+
+
+def _meta_path(code):
+    return os.path.join(PRICE_DIR, f"{code}.json")
+
+
+def _load_meta(code):
+    path = _meta_path(code)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_meta(code, meta):
+    write_json(_meta_path(code), meta)
+
+
+def load_bars(code):
+    """저장된 일봉을 반환합니다 (index=Date 오름차순). 없으면 빈 DataFrame."""
+    path = _bars_path(code)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    try:
+        return pd.read_parquet(path).set_index('Date')
+    except Exception as e:
+        print(f"Price store read error ({code}): {e}")
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+
+def _fetch_bars(code, start, end):
+    df = fdr.DataReader(code, start, end)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    df = df[COLUMNS]
+    df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+    df.index.name = 'Date'
+    return df
+
+
+def sync_bars(code, days):
+    """
+    최근 days일을 포함하도록 저장소를 갱신하고 전체 저장분을 반환합니다.
+    - 뒤쪽: 마지막 동기화가 16:00 기준 이전이면 마지막 저장일부터 오늘까지 조회 (장중 임시 봉 교체)
+    - 앞쪽: 요청 시작일이 이미 확인한 구간(covered_from)보다 앞이면 그 구간만 조회
+    """
+    with _lock_for(code):
+        bars = load_bars(code)
+        meta = _load_meta(code)
+        now = datetime.now(KST)
+        start = (now - timedelta(days=days)).date()
+        today = now.date()
+
+        frames = []
+        covered_from = meta.get("covered_from")
+        try:
+            if bars.empty or covered_from is None:
+                frames.append(_fetch_bars(code, start, today))
+                covered_from = start.isoformat()
+            else:
+                if start.isoformat() < covered_from:
+                    # 상장 이전 구간 등 빈 결과도 확인한 것으로 기록하여 반복 조회 방지
+                    frames.append(_fetch_bars(code, start, datetime.fromisoformat(covered_from).date() - timedelta(days=1)))
+                    covered_from = start.isoformat()
+
+                synced_at = meta.get("synced_at")
+                if synced_at is None or datetime.fromisoformat(synced_at) < get_cache_cutoff(now):
+                    frames.append(_fetch_bars(code, bars.index.max().date(), today))
+        except Exception as e:
+            # 네트워크 실패 시 저장분으로 응답
+            print(f"Error fetching price history for {code}: {e}")
+            return bars
+
+        if not frames:
+            return bars
+
+        # 새로 받은 봉이 기존 봉을 대체 (같은 날짜는 최신 조회값 사용)
+        merged = pd.concat([bars] + frames)
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        try:
+            write_parquet(_bars_path(code), merged.reset_index())
+            _save_meta(code, {"covered_from": covered_from, "synced_at": now.isoformat()})
+        except Exception as e:
+            print(f"Price store write error ({code}): {e}")
+        return merged
+
+
+def get_bars(code, days):
+    """최근 days일 일봉을 저장소에서 잘라 반환합니다 (필요 시 부족한 구간만 조회)."""
+    bars = sync_bars(code, days)
+    since = pd.Timestamp((datetime.now(KST) - timedelta(days=days)).date())
+    return bars[bars.index >= since]
+
+
+def prefetch_bars(codes, days, max_workers=PREFETCH_WORKERS):
+    """
+    여러 종목의 최근 days일 일봉을 동시에 조회하여 저장소를 채웁니다.
+    종목별 오류는 해당 종목만 제외하고 나머지는 계속 진행합니다.
+    Returns: {code: DataFrame}
+    """
+    codes = list(dict.fromkeys(codes))
+    results = {}
+    if not codes:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_bars, code, days): code for code in codes}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                results[code] = future.result()
+            except Exception as e:
+                print(f"Price prefetch error ({code}): {e}")
+    return results
+
+
+def prefetch_in_background(codes, days, max_workers=PREFETCH_WORKERS):
+    """
+    prefetch_bars를 데몬 스레드에서 실행합니다. (화면 렌더링을 막지 않음)
+    이번 16:00 기준으로 이미 days일 이상 선조회했거나 조회 중인 종목은 건너뜁니다.
+    Returns: 실제로 조회를 시작한 종목 수
+    """
+    cutoff = get_cache_cutoff().isoformat()
+    with _prefetch_guard:
+        pending = []
+        for code in dict.fromkeys(codes):
+            done = _prefetched.get(code)
+            if code in _in_flight or (done is not None and done[0] == cutoff and done[1] >= days):
+                continue
+            pending.append(code)
+        _in_flight.update(pending)
+    if not pending:
+        return 0
+
+    def run():
+        try:
+            results = prefetch_bars(pending, days, max_workers)
+            with _prefetch_guard:
+                for code in results:
+                    _prefetched[code] = (cutoff, days)
+        finally:
+            with _prefetch_guard:
+                _in_flight.difference_update(pending)
+
+    threading.Thread(target=run, name="price-prefetch", daemon=True).start()
+    return len(pending)
@@ -0,0 +1,152 @@
+import asyncio
+import random
+import threading
+import time
+
+# 호스트별 적응형 요청 제한기
+# - Token Bucket: 초당 요청 수(rate) 제한
+# - 동시 요청 수(concurrency) 제한
+# - AIMD: 응답이 정상(지연시간 목표 이내)이면 rate/concurrency를 조금씩 증가,
+#         429/5xx/타임아웃이면 절반으로 감소
+
+
+# 호스트당 동시 요청 수 상한 (AIMD로 늘어날 수 있는 최대치)
+MAX_CONCURRENCY = 64
+
+
+class AdaptiveLimiter:
+    def __init__(self, host, rate=20.0, concurrency=16,
+                 min_rate=1.0, max_rate=100.0,
+                 min_concurrency=1, max_concurrency=MAX_CONCURRENCY,
+                 latency_target=2.0, decrease_cooldown=1.0):
+        self.host = host
+        self.rate = rate
+        self.concurrency = concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+
+        self._lock = threading.Lock()
+        self._tokens = rate
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._throttled = 0
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        # 버킷 용량 = 1초 분량
+        self._tokens = min(max(self.rate, 1.0), self._tokens + elapsed * self.rate)
+
+    def _try_acquire(self):
+        """
+        슬롯을 확보하면 0을, 아니면 다시 시도하기까지 기다릴 시간(초)을 반환합니다.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if self._in_flight >= int(self.concurrency):
+                return 0.05
+            if self._tokens < 1.0:
+                return (1.0 - self._tokens) / self.rate
+
+            self._tokens -= 1.0
+            self._in_flight += 1
+            return 0
+
+    def acquire(self):
+        while True:
+            wait = self._try_acquire()
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, latency, throttled=False, healthy=True):
+        """
+        요청 완료를 알립니다.
+        throttled: 429/503/타임아웃 등 서버 과부하 신호 여부 (rate/concurrency 반감)
+        healthy: False면 과부하 신호는 아니지만 정상 응답도 아님 (페이지 오류 등) -> 슬롯만 반환
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+
+            if throttled:
+                self._throttled += 1
+                self._healthy_streak = 0
+                # 같은 시점에 몰린 실패로 연속 반감되지 않도록 cooldown 적용
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._last_decrease = now
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                return
+
+            if not healthy:
+                return
+
+            if latency > self.latency_target:
+                # 느려지는 중: 증가 보류
+                self._healthy_streak = 0
+                return
+
+            # 현재 동시 요청 수만큼 연속 정상 응답 시 1단계 증가 (Additive Increase)
+            self._healthy_streak += 1
+            if self._healthy_streak >= int(self.concurrency):
+                self._healthy_streak = 0
+                self.rate = min(self.max_rate, self.rate + 1.0)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate_per_sec": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self._in_flight,
+                "throttled": self._throttled,
+            }
+
+
+def backoff_delay(attempt, base=0.5, cap=10.0, retry_after=None):
+    """
+    지수 백오프 + 지터 대기 시간(초). 서버가 Retry-After를 주면 그 이상 대기합니다.
+    """
+    delay = min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+    return delay
+
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(host):
+    """호스트별 제한기를 반환합니다 (최초 호출 시 생성)."""
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _registry_lock:
+            limiter = _limiters.setdefault(host, AdaptiveLimiter(host))
+    return limiter
+
+
+def get_limiter_stats():
+    """호스트별 현재 rate / concurrency 지표를 반환합니다."""
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return {limiter.host: limiter.stats() for limiter in limiters}
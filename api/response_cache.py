@@ -0,0 +1,172 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from utils.atomic_io import write_bytes
+
+# 원본 HTML 응답 디스크 캐시 (URL 기준)
+# - blobs/  : 본문을 gzip 압축하여 내용 해시(sha256)로 저장 (동일 내용은 1회만 저장)
+# - index/  : URL별 최신 본문 해시 + ETag/Last-Modified (조건부 요청용)
+# - parsed/ : (파서, 파서 버전, 본문 해시)별 파싱 결과 -> 내용이 같으면 재파싱 생략
+# - URL 항목이 새 본문으로 바뀌면 이전 본문은 참조가 없어지므로 하루 1회 정리 (prune)
+
+CACHE_DIR = os.path.join("data", "http_cache")
+BLOB_DIR = os.path.join(CACHE_DIR, "blobs")
+INDEX_DIR = os.path.join(CACHE_DIR, "index")
+PARSED_DIR = os.path.join(CACHE_DIR, "parsed")
+PRUNE_MARKER = os.path.join(CACHE_DIR, "last_prune")
+
+# 참조되지 않는 본문/파싱 결과 정리 주기(초)
+PRUNE_INTERVAL = 24 * 3600
+
+# 방금 저장되어 아직 URL 항목이 갱신되지 않은 본문을 지우지 않도록 두는 유예 시간(초)
+PRUNE_GRACE = 3600
+
+
+def _index_path(url):
+    return os.path.join(INDEX_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _blob_path(digest):
+    return os.path.join(BLOB_DIR, digest[:2], digest + ".html.gz")
+
+
+def _parsed_path(digest, parser_key):
+    return os.path.join(PARSED_DIR, parser_key, digest[:2], digest + ".json")
+
+
+def get_entry(url):
+    """
+    URL의 캐시 항목을 반환합니다. 없으면 None.
+    항목: {url, sha256, etag, last_modified, fetched_at}
+    """
+    path = _index_path(url)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        # 본문이 지워진 경우 항목도 무효
+        if not os.path.exists(_blob_path(entry["sha256"])):
+            return None
+        return entry
+    except Exception as e:
+        print(f"Response cache index error ({url}): {e}")
+        return None
+
+
+def conditional_headers(entry):
+    """캐시 항목으로 재검증 요청 헤더(If-None-Match / If-Modified-Since)를 만듭니다."""
+    headers = {}
+    if not entry:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store(url, text, response_headers=None):
+    """
+    응답 본문을 저장하고 내용 해시를 반환합니다.
+    동일 해시의 본문이 이미 있으면 본문 파일은 다시 쓰지 않습니다.
+    """
+    body = text.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()
+
+    blob_path = _blob_path(digest)
+    if not os.path.exists(blob_path):
+        write_bytes(blob_path, gzip.compress(body))
+
+    response_headers = response_headers or {}
+    entry = {
+        "url": url,
+        "sha256": digest,
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    }
+    write_bytes(_index_path(url), json.dumps(entry).encode("utf-8"))
+    return digest
+
+
+def touch(url, entry):
+    """304 Not Modified 응답 시 확인 시각만 갱신합니다."""
+    entry = dict(entry, fetched_at=time.time())
+    write_bytes(_index_path(url), json.dumps(entry).encode("utf-8"))
+    return entry
+
+
+def load_body(digest):
+    with open(_blob_path(digest), "rb") as f:
+        return gzip.decompress(f.read()).decode("utf-8")
+
+
+def get_parsed(digest, parser_key):
+    """내용 해시에 대한 파싱 결과가 있으면 반환합니다. 없으면 None."""
+    path = _parsed_path(digest, parser_key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def put_parsed(digest, parser_key, parsed):
+    write_bytes(_parsed_path(digest, parser_key), json.dumps(parsed, ensure_ascii=False).encode("utf-8"))
+
+
+def _referenced_digests():
+    digests = set()
+    if not os.path.isdir(INDEX_DIR):
+        return digests
+    for name in os.listdir(INDEX_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(INDEX_DIR, name), "r", encoding="utf-8") as f:
+                digests.add(json.load(f)["sha256"])
+        except Exception:
+            pass
+    return digests
+
+
+def prune(grace=PRUNE_GRACE):
+    """
+    어떤 URL 항목도 가리키지 않는 본문(blobs)과 파싱 결과(parsed)를 삭제합니다.
+    (같은 본문을 여러 URL이 공유할 수 있으므로 전체 항목 기준으로 참조 여부 판단)
+    Returns: 삭제한 파일 수
+    """
+    referenced = _referenced_digests()
+    cutoff = time.time() - grace
+    removed = 0
+    for root_dir in (BLOB_DIR, PARSED_DIR):
+        for dirpath, _, filenames in os.walk(root_dir):
+            for name in filenames:
+                if name.endswith(".tmp") or name.split(".", 1)[0] in referenced:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def maybe_prune():
+    """마지막 정리 후 PRUNE_INTERVAL이 지났으면 prune을 실행합니다."""
+    try:
+        if os.path.exists(PRUNE_MARKER) and time.time() - os.path.getmtime(PRUNE_MARKER) < PRUNE_INTERVAL:
+            return 0
+        write_bytes(PRUNE_MARKER, str(time.time()).encode("utf-8"))
+        return prune()
+    except Exception as e:
+        print(f"Response cache prune error: {e}")
+        return 0
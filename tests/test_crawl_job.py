@@ -0,0 +1,21 @@
+import json
+
+from utils import crawl_job
+from utils.crawl_job import CrawlJob
+
+# 체크포인트 파일 복구 테스트 (기록 도중 중단된 마지막 줄)
+
+
+def test_load_truncates_torn_last_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_job, "JOB_DIR", str(tmp_path))
+    path = tmp_path / "job.jsonl"
+    path.write_text(json.dumps({"code": "005930"}) + "\n" + '{"code": "0006', encoding="utf-8")
+
+    job = CrawlJob("job", ["005930", "000660"])
+    assert job.pending_codes() == ["000660"]
+
+    job.record({"code": "000660"})
+
+    reloaded = CrawlJob("job", ["005930", "000660"])
+    assert reloaded.pending_codes() == []
+    assert [json.loads(line)["code"] for line in path.read_text(encoding="utf-8").splitlines()] == ["005930", "000660"]
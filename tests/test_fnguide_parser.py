@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from api import fnguide_parser
+from api.fnguide_parser import parse_finance_page, parse_main_page
+
+# 저장된 FnGuide 페이지(일부 발췌)에 대한 파싱 회귀 테스트
+# 기대값은 기존 html.parser 전체 트리 파싱(get_company_snapshot 원본)이 같은 페이지에서 낸 결과
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+EXPECTED_MAIN = {
+    "pbr": 1.12,
+    "per": 14.91,
+    "dividend_yield": 2.08,
+    "roe": 4.14,
+    "treasury_shares": 0.0,
+}
+
+EXPECTED_FINANCE = {
+    "equity": 3636779.0,
+    "retained": 0.0,
+    "current_assets": 1959366.0,
+    "cash_equivalents": 693081.0,
+    "retained_rate": 0.0,
+    "cash_ratio": 35.4,
+}
+
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def parser(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    monkeypatch.setattr(fnguide_parser, "HTML_PARSER", request.param)
+    return request.param
+
+
+def test_parse_main_page(parser):
+    assert parse_main_page(_read_fixture("svd_main.html")) == EXPECTED_MAIN
+
+
+def test_parse_finance_page(parser):
+    assert parse_finance_page(_read_fixture("svd_finance.html")) == EXPECTED_FINANCE
+
+
+def test_parse_finance_page_without_balance_sheet(parser):
+    assert parse_finance_page("<html><body><div id='divSonikY'></div></body></html>") == {}
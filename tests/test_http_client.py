@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from api import http_client
+from api.rate_limiter import AdaptiveLimiter
+
+# 호스트별 제한기 슬롯 반환 테스트 (네트워크 없이 공유 세션을 대체)
+
+
+class _FailingSession:
+    def __init__(self, error):
+        self.error = error
+
+    def get(self, url, **kwargs):
+        raise self.error
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = AdaptiveLimiter("example.test")
+    monkeypatch.setattr(http_client, "get_limiter", lambda host: limiter)
+    monkeypatch.setattr(http_client, "backoff_delay", lambda *args, **kwargs: 0)
+    return limiter
+
+
+def test_fetch_releases_slot_on_unexpected_error(limiter, monkeypatch):
+    monkeypatch.setattr(http_client, "get_session", lambda: _FailingSession(UnicodeDecodeError("utf-8", b"", 0, 1, "bad")))
+
+    with pytest.raises(UnicodeDecodeError):
+        http_client.fetch("https://example.test/page")
+
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["concurrency"] == 16
+
+
+class _FailingAsyncSession:
+    def __init__(self, error):
+        self.error = error
+
+    def get(self, url, **kwargs):
+        error = self.error
+
+        class _Context:
+            async def __aenter__(self):
+                raise error
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Context()
+
+
+def test_fetch_async_releases_slot_on_cancel(limiter):
+    if http_client.aiohttp is None:
+        pytest.skip("aiohttp not installed")
+    import asyncio
+
+    session = _FailingAsyncSession(asyncio.CancelledError())
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(http_client.fetch_async(session, "https://example.test/page"))
+
+    assert limiter.stats()["in_flight"] == 0
+
+
+class _StatusSession:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        response = http_client.requests.Response()
+        response.status_code = self.status_code
+        response._content = b""
+        return response
+
+
+def test_fetch_page_error_does_not_cut_rate(limiter, monkeypatch):
+    session = _StatusSession(500)
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+
+    response = http_client.fetch("https://example.test/page", retries=3)
+
+    assert response.status_code == 500
+    assert session.calls == 4
+    assert limiter.stats()["concurrency"] == 16
+    assert limiter.stats()["rate_per_sec"] == 20
+
+
+def test_fetch_backs_off_once_per_retry_chain(limiter, monkeypatch):
+    limiter.decrease_cooldown = 0
+    monkeypatch.setattr(http_client, "get_session", lambda: _StatusSession(429))
+
+    http_client.fetch("https://example.test/page", retries=3)
+
+    assert limiter.stats()["concurrency"] == 8
+    assert limiter.stats()["rate_per_sec"] == 10
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("OpenDartReader")
+
+from api import dart_quota
+from api.dart_quota import KeyPool, MeteredDart
+from api.opendart_client import aggregate_shareholders
+
+# 정기보고서 최대주주 현황(hyslrSttus.json) 응답 집계 테스트
+# 픽스처는 DART 응답 형식(삼성전자 2023 사업보고서, 일부 발췌)을 그대로 따름
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _load_payload():
+    with open(os.path.join(FIXTURE_DIR, "hyslrSttus_00126380_2023_11011.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_aggregate_uses_common_stock_and_skips_total_rows():
+    df = pd.DataFrame(_load_payload()["list"]).assign(stock_code="005930")
+
+    result = aggregate_shareholders(df)
+
+    assert "계" not in set(result["nm"])
+    assert result["stake"].sum() == pytest.approx(17.14)
+    assert result.iloc[0][["nm", "relate", "stake"]].tolist() == ["삼성생명보험", "계열회사", 8.51]
+    assert result.set_index("nm").loc["홍라희", "stake"] == pytest.approx(1.91)
+
+
+class _Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+def test_report_requests_largest_shareholder_endpoint(monkeypatch):
+    requests = []
+
+    def fake_fetch(url, params=None, **kwargs):
+        requests.append((url, params))
+        return _Response(_load_payload())
+
+    monkeypatch.setattr(dart_quota, "fetch", fake_fetch)
+    monkeypatch.setattr(dart_quota, "record", lambda key, calls=1: None)
+    monkeypatch.setattr(KeyPool, "select", lambda self: "key")
+
+    df = MeteredDart(None, KeyPool(["key"])).report("00126380", "최대주주", 2023, reprt_code="11011")
+
+    url, params = requests[0]
+    assert url.endswith("/hyslrSttus.json")
+    assert params["corp_code"] == "00126380" and params["bsns_year"] == 2023 and params["reprt_code"] == "11011"
+    assert len(df) == len(_load_payload()["list"])
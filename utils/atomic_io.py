@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+# 디스크 캐시/상태 파일 공용 원자적 쓰기
+# - 같은 폴더의 임시 파일에 쓴 뒤 os.replace로 교체 -> 읽는 쪽은 이전 파일 또는 완성된 새 파일만 봄
+# - 임시 파일명은 mkstemp로 생성하므로 여러 스레드가 같은 파일을 동시에 써도 서로 덮어쓰지 않음
+
+
+def atomic_write(path, write_fn):
+    """write_fn(temp_path)로 임시 파일을 만든 뒤 path로 교체합니다. 실패하면 임시 파일을 지웁니다."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory or None, suffix=".tmp")
+    os.close(fd)
+    try:
+        write_fn(temp_path)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_bytes(path, data):
+    def write(temp_path):
+        with open(temp_path, "wb") as f:
+            f.write(data)
+
+    atomic_write(path, write)
+
+
+def write_json(path, obj, **kwargs):
+    """json.dump(obj, **kwargs) 결과를 UTF-8로 저장합니다."""
+    def write(temp_path):
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, **kwargs)
+
+    atomic_write(path, write)
+
+
+def write_parquet(path, df):
+    """DataFrame을 parquet으로 저장합니다. (index는 저장하지 않음)"""
+    atomic_write(path, lambda temp_path: df.to_parquet(temp_path, index=False))
@@ -0,0 +1,21 @@
+import datetime
+
+# KST Timezone Definition (UTC+9)
+KST = datetime.timezone(datetime.timedelta(hours=9))
+
+# 일별 데이터 갱신 기준 시각 (장 마감 이후, 16:00 KST)
+DAILY_CUTOFF_HOUR = 16
+
+
+def get_cache_cutoff(now=None):
+    """
+    현재 시각 기준으로 유효한 캐시의 기준 시각(가장 최근의 16:00 KST)을 반환합니다.
+    현재 시간이 16:00 이전이면 어제 16:00가 기준입니다.
+    """
+    if now is None:
+        now = datetime.datetime.now(KST)
+
+    cutoff_time = now.replace(hour=DAILY_CUTOFF_HOUR, minute=0, second=0, microsecond=0)
+    if now < cutoff_time:
+        cutoff_time = cutoff_time - datetime.timedelta(days=1)
+    return cutoff_time
@@ -0,0 +1,154 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+JOB_DIR = os.path.join("data", "crawl_jobs")
+
+
+class CrawlJob:
+    """
+    종목별 수집 결과를 도착 즉시 체크포인트 파일(JSONL)에 기록하는 크롤링 작업입니다.
+    같은 job_id로 다시 열면 이미 완료된 종목은 건너뛰고 남은 종목만 수집할 수 있습니다.
+    """
+
+    def __init__(self, job_id, codes):
+        self.job_id = job_id
+        self.codes = list(codes)
+        self.path = os.path.join(JOB_DIR, f"{job_id}.jsonl")
+        self._lock = threading.Lock()
+        self._records = self._load()
+
+    @classmethod
+    def for_cutoff(cls, prefix, cutoff_time, codes):
+        """
+        일별 기준 시각(16:00 KST) 단위의 작업을 엽니다. 이전 기준 시각의 체크포인트는 삭제합니다.
+        """
+        job_id = f"{prefix}_{cutoff_time.strftime('%Y%m%d_%H%M')}"
+        for stale in glob.glob(os.path.join(JOB_DIR, f"{prefix}_*.jsonl")):
+            if os.path.basename(stale) != f"{job_id}.jsonl":
+                try:
+                    os.remove(stale)
+                except OSError as e:
+                    print(f"Error removing stale checkpoint {stale}: {e}")
+        return cls(job_id, codes)
+
+    def _load(self):
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, "rb+") as f:
+            content = f.read()
+            complete = content.rfind(b"\n") + 1
+            if complete < len(content):
+                # 기록 도중 중단된 마지막 줄은 잘라냄 (해당 종목은 다시 수집)
+                # 남겨두면 다음 record가 같은 줄에 이어 붙어 그 종목까지 손상됨
+                f.truncate(complete)
+                print(f"Truncated torn line in checkpoint {self.path}")
+
+        for line in content[:complete].decode("utf-8", errors="replace").splitlines():
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[data["code"]] = data
+
+        if records:
+            print(f"Resuming crawl job {self.job_id}: {len(records)}/{len(self.codes)} codes done")
+        return records
+
+    def record(self, data):
+        """수집 완료된 종목 1건을 체크포인트에 추가합니다 (스레드 안전)."""
+        line = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(JOB_DIR, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[data["code"]] = data
+
+    def pending_codes(self):
+        with self._lock:
+            return [code for code in self.codes if code not in self._records]
+
+    def completed_count(self):
+        with self._lock:
+            return len(self._records)
+
+    def to_dataframe(self):
+        """체크포인트된 결과를 get_batch_company_data와 같은 스키마의 DataFrame으로 반환합니다."""
+        with self._lock:
+            records = [self._records[code] for code in self.codes if code in self._records]
+        return pd.DataFrame(records)
+
+    def finalize(self):
+        """일별 스냅샷 저장이 끝난 뒤 체크포인트 파일을 정리합니다."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class CrawlRun:
+    """CrawlRunner가 시작한 크롤링 1회 (진행률 표시용 정보 포함)"""
+
+    def __init__(self, job, thread):
+        self.job = job
+        self.thread = thread
+        self.started_at = time.time()
+        self.pending_at_start = len(job.pending_codes())
+
+    def is_running(self):
+        return self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        self.thread.join(timeout)
+
+
+class CrawlRunner:
+    """
+    기준 시각(round_key)당 크롤링 작업을 한 번만 백그라운드 스레드에서 실행합니다. (프로세스 전역)
+    Streamlit rerun으로 화면 스크립트가 중단되어도 수집은 계속되고,
+    다음 rerun은 새 크롤링을 시작하지 않고 진행 중인 작업을 따라갑니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def start(self, round_key, job_factory, crawl_fn):
+        """
+        round_key의 작업이 없으면 job_factory()로 작업을 열고 crawl_fn(job)을 백그라운드에서 실행합니다.
+        이미 시작(또는 완료)된 작업이 있으면 그 작업을 반환합니다.
+        Returns: CrawlRun
+        """
+        with self._lock:
+            run = self._runs.get(round_key)
+            if run is not None:
+                return run
+
+            # 지난 기준 시각의 완료된 작업 정리
+            self._runs = {key: old for key, old in self._runs.items() if old.is_running()}
+
+            job = job_factory()
+
+            def target():
+                try:
+                    crawl_fn(job)
+                except Exception as e:
+                    print(f"Crawl job {job.job_id} error: {e}")
+
+            run = CrawlRun(job, threading.Thread(target=target, name=f"crawl-{job.job_id}", daemon=True))
+            self._runs[round_key] = run
+            run.thread.start()
+            return run
+
+    def is_done(self, round_key):
+        """round_key의 작업이 시작되었고 끝났는지 (성공 여부와 무관하게 기준 시각당 1회만 시도)"""
+        with self._lock:
+            run = self._runs.get(round_key)
+        return run is not None and not run.is_running()
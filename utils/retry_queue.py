@@ -0,0 +1,76 @@
+import threading
+
+
+class RetryQueue:
+    """
+    수집 실패 또는 비정상 지표로 판정된 종목만 백그라운드에서 다시 수집하는 큐입니다.
+
+    fetch_fn(codes) -> DataFrame : 재수집 함수
+    patch_fn(df)                 : 재수집 결과를 현재 스냅샷에 반영하는 함수
+    같은 round_key(예: 일별 기준 시각) 안에서는 종목당 1회만 재시도합니다.
+    """
+
+    def __init__(self, fetch_fn, patch_fn):
+        self._fetch_fn = fetch_fn
+        self._patch_fn = patch_fn
+        self._lock = threading.Lock()
+        self._pending = []
+        self._round_key = None
+        self._attempted = set()
+        self._worker = None
+        self.version = 0 # 스냅샷에 패치가 반영될 때마다 증가
+
+    def submit(self, round_key, codes):
+        """재수집 대상 종목을 추가합니다. 새로 추가된 종목 수를 반환합니다."""
+        with self._lock:
+            if round_key != self._round_key:
+                self._round_key = round_key
+                self._attempted = set()
+
+            new_codes = [code for code in codes if code not in self._attempted]
+            if not new_codes:
+                return 0
+
+            self._attempted.update(new_codes)
+            self._pending.extend(new_codes)
+
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="retry-queue", daemon=True)
+                self._worker.start()
+
+        return len(new_codes)
+
+    def refresh(self, codes):
+        """
+        원본 데이터가 바뀐 종목(신규 공시 등)을 재시도 이력과 무관하게 재수집 대상에 추가합니다.
+        """
+        with self._lock:
+            new_codes = [code for code in codes if code not in self._pending]
+            self._pending.extend(new_codes)
+
+            if new_codes and self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="retry-queue", daemon=True)
+                self._worker.start()
+
+        return len(new_codes)
+
+    def is_running(self):
+        with self._lock:
+            return self._worker is not None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._worker = None
+                    return
+
+            try:
+                print(f"Retrying {len(batch)} codes in background")
+                df = self._fetch_fn(batch)
+                if df is not None and not df.empty and self._patch_fn(df):
+                    with self._lock:
+                        self.version += 1
+            except Exception as e:
+                print(f"Retry queue error: {e}")
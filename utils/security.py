@@ -82,6 +82,27 @@ def load_from_env():
 
     return None
 
+def load_key_pool():
+    """
+    한도 소진 시 교체해 사용할 추가 OpenDart API Key 목록을 로드합니다.
+    Streamlit Secrets의 OPENDART_API_POOL(리스트 또는 쉼표 구분 문자열), 없으면 같은 이름의 환경 변수를 확인합니다.
+    """
+    pool = None
+    try:
+        if "OPENDART_API_POOL" in st.secrets:
+            pool = st.secrets["OPENDART_API_POOL"]
+    except FileNotFoundError:
+        pass
+    except Exception:
+        pass
+
+    if pool is None:
+        pool = os.environ.get("OPENDART_API_POOL", "")
+
+    if isinstance(pool, str):
+        pool = pool.split(",")
+    return [key.strip() for key in pool if key and key.strip()]
+
 def check_credentials_exist():
     """자격 증명 파일이 존재하는지 확인합니다."""
     return os.path.exists(SECRETS_FILE)
@@ -0,0 +1,57 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키의 요청이 동시에 여러 번 들어오면 1회만 실행하고 결과를 공유합니다.
+    (완료된 결과는 보관하지 않음 -> 캐시가 아니라 동시 중복 요청 병합용)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        key에 대해 진행 중인 실행이 있으면 완료를 기다려 같은 결과(또는 예외)를 반환하고,
+        없으면 fn(*args, **kwargs)를 실행합니다.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# 프로세스 전역 인스턴스 (세션 간 공유)
+_flights = SingleFlight()
+
+
+def single_flight(corp_code, base_year, kind, fn, *args, **kwargs):
+    """(corp_code, base_year, kind) 키로 동시 요청을 병합합니다."""
+    return _flights.do((corp_code, base_year, kind), fn, *args, **kwargs)
@@ -16,20 +16,38 @@ import json
 import glob
 import datetime
 
-from api.opendart_client import OpenDartClient
+from api.opendart_client import get_opendart_client
 
-from api.market_data import get_market_metrics, get_krx_listing, get_stock_history
+from api.disclosure_store import DISCLOSURE_TYPES
 
-from api.company_guide import get_batch_company_data
+from api.disclosure_poller import DisclosurePoller
+
+from api.market_data import get_market_metrics, get_krx_listing, get_listing_index, get_stock_history
+
+from api.price_matrix import build_from_store, load_price_matrix
+
+from api.price_store import prefetch_in_background
+
+from api.company_guide import get_batch_company_data, iter_batch_company_data
 
 from api.naver_news import fetch_naver_news_search
 
-from utils.security import save_credentials, load_credentials, verify_pin, check_credentials_exist, load_from_env
+from utils.security import save_credentials, load_credentials, verify_pin, check_credentials_exist, load_from_env, load_key_pool
 
 from utils.logger import log_transition
 
 from utils.state_manager import save_state, load_state
 
+from utils.atomic_io import write_json
+
+from utils.cache_policy import KST, get_cache_cutoff
+
+from utils.crawl_job import CrawlJob, CrawlRunner
+
+from utils.retry_queue import RetryQueue
+
+from utils.single_flight import single_flight
+
 import atexit
 
 
@@ -42,6 +60,12 @@ atexit.register(save_state)
 
 # GLOBAL_API_KEY Removed for security management via Sidebar
 
+# 개별 종목 분석의 재무 이력 연도 수 (사업보고서 기준)
+HISTORY_YEARS = 10
+
+# 주가 추이 선조회 기간 (조회 기간 선택지 중 최장 12개월)
+TREND_PREFETCH_DAYS = 365
+
 
 
 # --- [Configuration] 페이지 설정 ---
@@ -53,11 +77,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# KST Timezone Definition (UTC+9)
-KST = datetime.timezone(datetime.timedelta(hours=9))
-
-
-
 # --- [Caching Layer] JSON File Management ---
 
 CACHE_DIR = "data"
@@ -87,34 +106,46 @@ def save_favorites_to_disk(analysis_favs, trend_favs):
         print(f"Error saving favorites: {e}")
 
 
-def get_valid_cache():
+def _latest_cache_file():
+    files = glob.glob(os.path.join(CACHE_DIR, "company_data_*.json"))
+    if not files:
+        return None
+    return max(files, key=os.path.getctime)
+
+
+def snapshot_codes():
+    """현재 일별 스냅샷에 포함된 종목코드 (스냅샷이 없으면 빈 set)"""
+    latest_file = _latest_cache_file()
+    if not latest_file:
+        return set()
+    try:
+        with open(latest_file, 'r', encoding='utf-8') as f:
+            return {str(row.get('종목코드')) for row in json.load(f)}
+    except Exception as e:
+        print(f"Cache Load Error: {e}")
+        return set()
+
+
+def _valid_cache_file():
     """
-    매일 16:00 (KST/UTC+9) 기준으로 유효한 캐시 파일이 있는지 확인하고 로드합니다.
+    매일 16:00 (KST/UTC+9) 기준으로 유효한 캐시 파일을 찾습니다. (로드하지 않음)
 
     파일명 형식: company_data_YYYYMMDD_HHMMSS.json
-    Returns: (DataFrame, datetime) or (None, None)
+    Returns: (filepath, datetime) or (None, None)
     """
 
     if not os.path.exists(CACHE_DIR):
         os.makedirs(CACHE_DIR, exist_ok=True)
         return None, None
 
-    # 기준 시간 설정 (매일 16:00 KST)
-    now = datetime.datetime.now(KST)
-    cutoff_time = now.replace(hour=16, minute=0, second=0, microsecond=0)
-    
-    # 현재 시간이 16:00 이전이면, 어제 16:00가 기준
-    if now < cutoff_time:
-        cutoff_time = cutoff_time - datetime.timedelta(days=1)
+    # 기준 시간 설정 (매일 16:00 KST, 현재 시간이 16:00 이전이면 어제 16:00가 기준)
+    cutoff_time = get_cache_cutoff()
         
-    # 캐시 파일 검색
-    files = glob.glob(os.path.join(CACHE_DIR, "company_data_*.json"))
+    # 캐시 파일 검색 (최신 파일)
+    latest_file = _latest_cache_file()
 
-    if not files:
+    if not latest_file:
         return None, None
-        
-    # 최신 파일 찾기
-    latest_file = max(files, key=os.path.getctime)
     
     # 파일명에서 시간 파싱 (company_data_20241220_160500.json)
     try:
@@ -127,10 +158,7 @@ def get_valid_cache():
         
         # 유효성 검사 (기준 시간 이후 생성된 파일인가?)
         if file_time >= cutoff_time:
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"Loaded cache from {filename}")
-                return pd.DataFrame(data), file_time
+            return latest_file, file_time
 
     except Exception as e:
         print(f"Cache Load Error: {e}")
@@ -139,6 +167,28 @@ def get_valid_cache():
     return None, None
 
 
+def get_valid_cache():
+    """
+    매일 16:00 (KST/UTC+9) 기준으로 유효한 캐시 파일이 있는지 확인하고 로드합니다.
+
+    Returns: (DataFrame, datetime) or (None, None)
+    """
+    cache_file, file_time = _valid_cache_file()
+
+    if not cache_file:
+        return None, None
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            print(f"Loaded cache from {os.path.basename(cache_file)}")
+            return pd.DataFrame(data), file_time
+
+    except Exception as e:
+        print(f"Cache Load Error: {e}")
+        return None, None
+
+
 def save_daily_cache(df):
     """
 
@@ -176,14 +226,209 @@ def save_daily_cache(df):
 
 
 
+def patch_daily_cache(df_guide):
+    """
+    재수집된 종목의 지표를 현재 일별 스냅샷 파일에 반영합니다. (백그라운드 재수집용)
+    재수집 결과도 비정상인 종목은 반영하지 않습니다. 반영된 종목이 있으면 True.
+    기준 시각 이전의 만료된 스냅샷은 패치하지 않습니다. (False -> 전체 재수집으로 진행)
+    """
+    latest_file, _ = _valid_cache_file()
+    if not latest_file:
+        return False
+
+    try:
+        with open(latest_file, 'r', encoding='utf-8') as f:
+            df_snapshot = pd.DataFrame(json.load(f))
+
+        guide_map = df_guide.set_index('code').to_dict('index')
+        df_new = pd.DataFrame([{"종목코드": code, **compute_guide_metrics(g_data)} for code, g_data in guide_map.items()])
+
+        # 여전히 비정상인 종목 제외
+        fixed = df_new[~df_new['종목코드'].isin(find_suspect_codes(df_new))].set_index('종목코드')
+        fixed = fixed[fixed.index.isin(df_snapshot['종목코드'])]
+        if fixed.empty:
+            return False
+
+        columns = list(df_snapshot.columns)
+        df_snapshot = df_snapshot.set_index('종목코드')
+        df_snapshot.update(fixed)
+        df_snapshot = df_snapshot.reset_index()[columns]
+        df_snapshot = df_snapshot.sort_values(by="종합점수", ascending=False)
+
+        # Atomic Write: 같은 파일명을 유지하여 16:00 기준 유효성 판단이 바뀌지 않도록 함
+        write_json(latest_file, df_snapshot.to_dict('records'), ensure_ascii=False, indent=4)
+
+        print(f"Cache Patched: {latest_file} ({len(fixed)} codes)")
+        return True
+
+    except Exception as e:
+        print(f"Cache Patch Error: {e}")
+        return False
+
+
+
 # --- [Data Layer] Hybrid Data Generation (FinanceDataReader) ---
 
+def _metric(g_data, key):
+    """수집 결과의 수치 지표 (누락 또는 NaN이면 0)"""
+    val = g_data.get(key)
+    return 0 if val is None or pd.isna(val) else val
+
+
+def compute_guide_metrics(g_data):
+    """
+    FnGuide 수집 결과(dict)를 대시보드 지표 컬럼으로 변환합니다. (종합점수 포함)
+    """
+    pbr = _metric(g_data, 'pbr')
+    div = _metric(g_data, 'dividend_yield')
+    roe = _metric(g_data, 'roe')
+
+    # Score Logic
+    score = ((3 - min(pbr, 3)) * 30) + (div * 5) + (roe * 1.5)
+
+    return {
+        "PBR(배)": round(pbr, 2),
+        "PER(배)": round(_metric(g_data, 'per'), 2),
+        "배당수익률(%)": round(div, 2),
+        "ROE(%)": round(roe, 1),
+        "종합점수": round(score, 1),
+        "이익잉여금비율(%)": float(_metric(g_data, 'retained_rate')),
+        "현금비중(%)": float(_metric(g_data, 'cash_ratio'))
+    }
+
+
+def find_suspect_codes(df):
+    """
+    지표가 누락되었거나 비정상 범위인 종목코드를 반환합니다. (벡터 연산)
+    - PBR 0 이하 또는 50 초과: Main 페이지 수집 실패 / 파싱 오류
+    - 이익잉여금비율, 현금비중 모두 0: Finance 페이지 수집 실패
+    - 현금비중 100% 초과: 파싱 오류
+    """
+    if df.empty:
+        return []
+
+    pbr = pd.to_numeric(df['PBR(배)'], errors='coerce').fillna(0)
+    ret = pd.to_numeric(df.get('이익잉여금비율(%)', pd.Series(0, index=df.index)), errors='coerce').fillna(0)
+    cash = pd.to_numeric(df.get('현금비중(%)', pd.Series(0, index=df.index)), errors='coerce').fillna(0)
+
+    mask = (pbr <= 0) | (pbr > 50) | ((ret == 0) & (cash == 0)) | (cash > 100)
+    return df.loc[mask, '종목코드'].tolist()
+
+
+@st.cache_resource
+def get_retry_queue():
+    """프로세스 전역 재수집 큐 (세션 간 공유)"""
+    return RetryQueue(
+        fetch_fn=lambda codes: get_batch_company_data(codes, concurrency=8),
+        patch_fn=patch_daily_cache
+    )
+
+
+@st.cache_resource
+def get_disclosure_poller(_api_key):
+    """
+    프로세스 전역 공시 피드 폴러. 신규 정기공시를 낸 기업의 스냅샷 행만 재수집합니다.
+    (DART 캐시/공시 저장소 무효화는 폴러가 직접 처리)
+    폴러 상태 파일은 하나뿐이므로 API Key와 무관하게 1개만 생성합니다. (_api_key: 캐시 키에서 제외, 첫 호출의 키 사용)
+    """
+    client = get_opendart_client(_api_key, load_key_pool())
+    retry_queue = get_retry_queue()
+
+    def list_filings(start, end, kind):
+        return client.dart.list(start=start, end=end, kind=kind)
+
+    def on_change(periodic_codes):
+        # 공시 피드는 시장 전체 기준 -> 대시보드 스냅샷 종목만 재수집 (공시 마감일에는 수천 개 기업이 공시)
+        universe = snapshot_codes()
+        changed = [code for code in periodic_codes if code in universe]
+        retry_queue.refresh(changed)
+        # 정기보고서의 최대주주 현황이 바뀌므로 지분율 다시 집계 (디스크 캐시는 폴러가 무효화)
+        if changed:
+            fetch_insider_ownership.clear()
+
+    return DisclosurePoller(list_filings, on_change)
+
+
+@st.cache_data(ttl=3600)
+def fetch_insider_ownership(api_key, codes):
+    """
+    대시보드 종목별 최대주주+특수관계인 보통주 지분율 합계(%)를 일괄 조회합니다.
+    (기업별 응답은 정기보고서별 디스크 캐시 사용 -> 최초 1회 이후 로컬 조회)
+    """
+    df = get_opendart_client(api_key, load_key_pool()).get_bulk_shareholders(list(codes))
+    if df.empty:
+        return {}
+    return df.groupby('stock_code')['stake'].sum().round(2).to_dict()
+
+
+def get_dashboard_universe():
+    """
+    대시보드 대상 종목 (KOSPI 시가총액 상위 200 + KOSDAQ 상위 100)
+    """
+    # 1. KRX 상장 리스트 가져오기
+    df_krx = get_krx_listing()
+
+    if df_krx.empty:
+        return pd.DataFrame()
+
+    # 2. 시가총액 상위 (KOSPI 200 + KOSDAQ 100)
+    df_kospi = df_krx[df_krx['Market'].str.contains('KOSPI')].sort_values(by='Marcap', ascending=False).head(200)
+    df_kosdaq = df_krx[df_krx['Market'].str.contains('KOSDAQ')].sort_values(by='Marcap', ascending=False).head(100)
+    return pd.concat([df_kospi, df_kosdaq])
+
+
+def build_dashboard_frame(top_n, df_guide, collected_only=False):
+    """
+    KRX 기본 정보와 FnGuide 수집 결과를 병합하여 종합점수 순으로 정렬합니다.
+    collected_only: 수집이 완료된 종목만 포함 (크롤링 진행 중 화면 표시용)
+    """
+    guide_map = df_guide.set_index('code').to_dict('index') if not df_guide.empty else {}
+
+    final_data = []
+    
+    for idx, row in top_n.iterrows():
+        code = row['Code']
+        if collected_only and code not in guide_map:
+            continue
+        g_data = guide_map.get(code, {})
+        
+        final_data.append({
+            "종목명": row['Name'],
+            "종목코드": code,
+            "시장": row['Market'], # [Added] Market
+            "업종": row.get('Sector', '미분류'),
+            "시가총액(억)": round(row['Marcap'] / 100000000),
+            **compute_guide_metrics(g_data)
+        })
+
+    if not final_data:
+        return pd.DataFrame()
+        
+    return pd.DataFrame(final_data).sort_values(by="종합점수", ascending=False)
+
+
+def open_dashboard_crawl_job(top_n):
+    """오늘(16:00 기준) 대시보드 크롤링 작업 (체크포인트)"""
+    return CrawlJob.for_cutoff("dashboard", get_cache_cutoff(), top_n['Code'].tolist())
+
+
+@st.cache_resource
+def get_dashboard_crawler():
+    """
+    대시보드 크롤링 실행기 (프로세스 전역, 기준 시각당 1회)
+    rerun이 크롤링을 중복으로 시작하지 않고, 실패 시에도 매 rerun마다 재크롤링하지 않도록 함
+    """
+    return CrawlRunner()
+
+
 @st.cache_data(ttl=3600)  # Re-enabled for Legacy Mode (CompanyGuide)
 def fetch_real_dashboard_data(api_key=None):
     """
     FinanceDataReader(fdr)와 FnGuide 크롤링을 사용하여 시가총액 상위 300개 종목의 주요 지표를 수집합니다.
 
     (Company Guide 크롤링 적용 - 배당수익률 포함 풍부한 데이터)
+    크롤링 자체는 render_dashboard에서 stream_dashboard_crawl로 진행하며,
+    일별 캐시가 아직 없으면 지금까지 체크포인트된 종목으로 구성합니다.
     """
 
     # 0. Daily Cache Check (JSON) - 매일 16:00 기준 유효한 파일이 있으면 즉시 반환
@@ -195,22 +440,12 @@ def fetch_real_dashboard_data(api_key=None):
     # Current time for new data
     current_date = datetime.datetime.now(KST)
 
-    # 1. KRX 상장 리스트 가져오기
-    df_krx = get_krx_listing()
+    top_n = get_dashboard_universe()
 
-    if df_krx.empty:
+    if top_n.empty:
         return pd.DataFrame(), current_date
     
 
-    # 2. 시가총액 상위 300개 (확장)
-    # 2. 시가총액 상위 (KOSPI 200 + KOSDAQ 100)
-    df_kospi = df_krx[df_krx['Market'].str.contains('KOSPI')].sort_values(by='Marcap', ascending=False).head(200)
-    df_kosdaq = df_krx[df_krx['Market'].str.contains('KOSDAQ')].sort_values(by='Marcap', ascending=False).head(100)
-    top_n = pd.concat([df_kospi, df_kosdaq])
-
-    target_codes = top_n['Code'].tolist()
-    
-
     # 3. 데이터 수집
     final_data = []
 
@@ -230,13 +465,8 @@ def fetch_real_dashboard_data(api_key=None):
         return pd.DataFrame(final_data), current_date
 
 
-    # [CompanyGuide Crawling]
-    if not target_codes:
-        return pd.DataFrame(), current_date
-
-
-    with st.spinner("CompanyGuide에서 300개 기업 데이터 수집 중... (약 120~300초 소요, 매일 16:00 업데이트)"):
-        df_guide = get_batch_company_data(target_codes)
+    # [CompanyGuide Crawling] 체크포인트된 수집 결과
+    df_guide = open_dashboard_crawl_job(top_n).to_dataframe()
         
 
     if df_guide.empty:
@@ -263,46 +493,58 @@ def fetch_real_dashboard_data(api_key=None):
 
 
     # 3. Merge
-    guide_map = df_guide.set_index('code').to_dict('index')
+    return build_dashboard_frame(top_n, df_guide), current_date
 
-    final_data = []
-    
-    for idx, row in top_n.iterrows():
-        code = row['Code']
-        g_data = guide_map.get(code, {})
-        
-        pbr = g_data.get('pbr', 0) or 0
-        div = g_data.get('dividend_yield', 0) or 0
-        roe = g_data.get('roe', 0) or 0
-        
-        ret_rate = g_data.get('retained_rate', 0)
-        cash_rate = g_data.get('cash_ratio', 0)
-        
-        # Score Logic
-        score = ((3 - min(pbr, 3)) * 30) + (div * 5) + (roe * 1.5)
-        
-        final_data.append({
-            "종목명": row['Name'],
-            "종목코드": code,
-            "시장": row['Market'], # [Added] Market
-            "업종": row.get('Sector', '미분류'),
-            "시가총액(억)": round(row['Marcap'] / 100000000),
-            "PBR(배)": round(pbr, 2),
-            "PER(배)": round(g_data.get('per', 0) or 0, 2),
-            "배당수익률(%)": round(div, 2), 
-            "ROE(%)": round(roe, 1),
-            "종합점수": round(score, 1),
-            "이익잉여금비율(%)": float(ret_rate), 
-            "현금비중(%)": float(cash_rate)
-        })
-        
-    result_df = pd.DataFrame(final_data).sort_values(by="종합점수", ascending=False)
-    
-    # [Save Daily Cache]
-    if not result_df.empty:
-        save_daily_cache(result_df)
-        
-    return result_df, current_date
+
+def stream_dashboard_crawl(crawl_round):
+    """
+    CompanyGuide 크롤링을 백그라운드에서 진행하면서 진행률(남은 시간)과 점수 상위 종목을 점진적으로 표시합니다.
+    종목별 결과는 체크포인트에 기록되며, 완료되면 일별 스냅샷을 저장합니다.
+    크롤링은 기준 시각당 1회만 시작되며, rerun 시에는 진행 중인 크롤링의 진행 상황만 다시 표시합니다.
+    """
+    top_n = get_dashboard_universe()
+
+    if top_n.empty:
+        return
+
+    def crawl(crawl_job):
+        for _ in iter_batch_company_data(crawl_job.pending_codes(), on_result=crawl_job.record):
+            pass
+
+        df_guide = crawl_job.to_dataframe()
+
+        # [Save Daily Cache] 스냅샷 저장 후 체크포인트 정리
+        if not df_guide.empty:
+            save_daily_cache(build_dashboard_frame(top_n, df_guide))
+            crawl_job.finalize()
+
+    run = get_dashboard_crawler().start(crawl_round, lambda: open_dashboard_crawl_job(top_n), crawl)
+    crawl_job = run.job
+    total = len(crawl_job.codes)
+
+    if run.is_running():
+        progress_bar = st.progress(crawl_job.completed_count() / total, text="CompanyGuide 데이터 수집 준비 중... (매일 16:00 업데이트)")
+        st.caption("수집이 끝난 종목부터 종합점수 순으로 표시됩니다.")
+        live_table = st.empty()
+
+        live_cols = ["종목명", "종목코드", "PBR(배)", "PER(배)", "배당수익률(%)", "ROE(%)", "종합점수", "이익잉여금비율(%)", "현금비중(%)"]
+
+        # 테이블 재렌더링은 1초 간격으로 제한
+        while run.is_running():
+            done_total = crawl_job.completed_count()
+            done_count = done_total - (total - run.pending_at_start)
+            if done_count > 0:
+                eta = (time.time() - run.started_at) / done_count * (run.pending_at_start - done_count)
+                progress_bar.progress(min(done_total / total, 1.0), text=f"CompanyGuide 데이터 수집 중... {done_total}/{total} (남은 시간 약 {eta:.0f}초)")
+
+                df_partial = build_dashboard_frame(top_n, crawl_job.to_dataframe(), collected_only=True)
+                if not df_partial.empty:
+                    live_table.dataframe(df_partial[live_cols].head(30), use_container_width=True, hide_index=True)
+
+            run.wait(1.0)
+
+        progress_bar.empty()
+        live_table.empty()
 
 
 
@@ -326,7 +568,9 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
         # 1. Market Data (Price, Market Cap)
 
-        market_info = get_market_metrics(corp_code)
+        # 같은 종목을 여러 세션이 동시에 분석하면 요청 1회만 실행하고 결과 공유
+
+        market_info = single_flight(corp_code, None, "market", get_market_metrics, corp_code)
 
         if not market_info:
 
@@ -335,7 +579,7 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
         # 2. Financial Data (OpenDart)
 
-        client = OpenDartClient(api_key)
+        client = get_opendart_client(api_key, load_key_pool())
 
         if client.init_error:
 
@@ -344,11 +588,15 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
         # 선택된 사업보고서 기준
 
-        financials = client.get_financial_summary(corp_code, base_year)
+        financials = single_flight(corp_code, base_year, "financials", client.get_financial_summary, corp_code, base_year)
         
 
         if not financials:
 
+            if client.is_quota_exhausted():
+
+                return None, "OpenDart API 일일 요청 한도를 모두 사용했습니다. (내일 다시 시도하거나 추가 API Key 등록 필요)"
+
             return None, f"{base_year}년도 OpenDart 재무 데이터를 찾을 수 없습니다. (API Key 확인 또는 공시 누락)"
 
 
@@ -382,52 +630,29 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
         def to_100m(val): return round(val / 100000000)
 
 
-        metrics_years = []
-
-        years = [base_year, base_year-1, base_year-2] # [Year, Year-1, Year-2]
-
-
-        for i in range(3):
-
-            eq = equity_list[i]
-
-            ret = retained_list[i]
-
-            # 현금성자산 + 단기금융상품
-
-            cash_plus_short = cash_list[i] + short_fin_list[i]
-
-            net_income = net_income_list[i]
-
-            cur_asset = current_assets_list[i]
-            
+        def year_metrics(year, assets, equity, liabilities, ret, cash_plus_short, cur_asset, net_income):
 
             # 1) 이익잉여금 비율
 
-            retained_rate = (ret / eq) * 100 if eq > 0 else 0
-            
-
-        # 2) 현금비중 (수정됨: (현금+단기금융) / 유동자산 * 100)
+            retained_rate = (ret / equity) * 100 if equity > 0 else 0
 
-            # 유동자산이 0이면 0 처리
+            # 2) 현금비중 ((현금+단기금융) / 유동자산 * 100, 유동자산이 0이면 0 처리)
 
             cash_ratio = (cash_plus_short / cur_asset) * 100 if cur_asset > 0 else 0
-            
 
             # ROE
 
-            roe_val = (net_income / eq) * 100 if eq > 0 else 0
-            
+            roe_val = (net_income / equity) * 100 if equity > 0 else 0
 
-            metrics_years.append({
+            return {
 
-                "year": years[i],
+                "year": year,
 
-                "assets": to_100m(assets_list[i]),
+                "assets": to_100m(assets),
 
-                "equity": to_100m(equity_list[i]),
+                "equity": to_100m(equity),
 
-                "liabilities": to_100m(liabilities_list[i]),
+                "liabilities": to_100m(liabilities),
 
                 "retained": to_100m(ret),
 
@@ -443,7 +668,44 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
                 "roe": round(roe_val, 1)
 
-            })
+            }
+
+
+        metrics_years = []
+
+        years = [base_year, base_year-1, base_year-2] # [Year, Year-1, Year-2]
+
+
+        for i in range(3):
+
+            metrics_years.append(year_metrics(
+
+                years[i], assets_list[i], equity_list[i], liabilities_list[i], retained_list[i],
+
+                cash_list[i] + short_fin_list[i], current_assets_list[i], net_income_list[i]
+
+            ))
+
+
+        # 장기 이력: 최근 3년 이전 연도는 사업보고서 이력 엔진으로 보충 (보고서 1건 = 3개 연도)
+
+        df_older = single_flight(corp_code, base_year, "history", client.get_financial_history, corp_code, base_year - 3, HISTORY_YEARS - 3)
+
+        df_older = df_older.fillna(0).sort_index(ascending=False)
+
+        for year, row in zip(df_older.index.tolist(), df_older.to_dict('records')):
+
+            if not any(row.values()):
+
+                continue
+
+            metrics_years.append(year_metrics(
+
+                year, row['자산총계'], row['자본총계'], row['부채총계'], row['이익잉여금'],
+
+                row['현금성자산'] + row['단기금융상품'], row['유동자산'], row['당기순이익']
+
+            ))
 
 
         # 현재 기준 주요 지표 (KPI)
@@ -460,7 +722,7 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
         # 주주 현황
 
-        shareholders = client.get_major_shareholders(corp_code)
+        shareholders = single_flight(corp_code, None, "shareholders", client.get_major_shareholders, corp_code)
         
 
         return {
@@ -479,7 +741,7 @@ def fetch_real_company_data(corp_code, api_key, base_year=2024):
 
             },
 
-            "history": metrics_years, # 3년치 재무 데이터
+            "history": metrics_years, # 최대 HISTORY_YEARS년치 재무 데이터 (최신 연도 우선)
 
             "market_cap": to_100m(market_cap),
 
@@ -498,8 +760,57 @@ def render_dashboard(api_key):
     # Pre-render a placeholder for immediate feedback or structure
     placeholder = st.empty()
     
-    # Fetch Data (this might take time if crawling)
+    # 백그라운드 재수집 결과가 스냅샷에 반영되었으면 캐시를 비우고 다시 로드
+    retry_queue = get_retry_queue()
+
+    # 신규 공시 기반 갱신 (공시를 낸 기업만 재수집)
+    if api_key and not get_opendart_client(api_key, load_key_pool()).init_error:
+        get_disclosure_poller(api_key).start()
+
+    if st.session_state.get("snapshot_patch_version", 0) != retry_queue.version:
+        fetch_real_dashboard_data.clear()
+        st.session_state["snapshot_patch_version"] = retry_queue.version
+
+    # 오늘자(16:00 기준) 스냅샷이 없으면 크롤링하며 결과를 점진적으로 표시 (기준 시각당 1회)
+    crawl_round = get_cache_cutoff().isoformat()
+    if api_key and not get_dashboard_crawler().is_done(crawl_round) and _valid_cache_file()[0] is None:
+        stream_dashboard_crawl(crawl_round)
+        fetch_real_dashboard_data.clear()
+
+    # Fetch Data (일별 스냅샷 로드)
     df_result, data_date = fetch_real_dashboard_data(api_key)
+
+    # 누락/비정상 지표 종목만 백그라운드 재수집 (전체 재크롤링 없이 스냅샷 패치)
+    # 전 종목이 비정상이면 수집 자체가 실패한 fail-safe 결과이므로 제외
+    if api_key and not df_result.empty:
+        suspect_codes = find_suspect_codes(df_result)
+        if len(suspect_codes) < len(df_result):
+            submitted = retry_queue.submit(get_cache_cutoff().isoformat(), suspect_codes)
+            if submitted:
+                st.toast(f"🔄 지표가 누락된 {submitted}개 종목을 백그라운드에서 재수집합니다.")
+
+    # 최대주주 지분율 (OpenDart 최대주주 현황 일괄 조회)
+    # 최초 조회는 종목당 DART 요청이 필요하므로 첫 화면을 막지 않도록 요청 시에만 조회 (이후 세션 동안 유지)
+    if api_key and not df_result.empty and not get_opendart_client(api_key, load_key_pool()).init_error:
+        dart_client = get_opendart_client(api_key, load_key_pool())
+        if st.session_state.get("show_insider_ownership") or st.button("👥 최대주주 지분율 조회", help="대시보드 종목의 최대주주+특수관계인 지분율을 DART에서 조회합니다."):
+            st.session_state["show_insider_ownership"] = True
+            codes = tuple(df_result['종목코드'])
+            # 한도 부족으로 빈 결과가 1시간 캐시되지 않도록 조회 전에 확인 (이 세션에서 이미 조회한 종목 목록이면 생략)
+            cost = 0 if st.session_state.get("insider_codes") == codes else dart_client.estimate_shareholder_cost(codes)
+            if not dart_client.quota.can_afford(cost):
+                st.warning(f"OpenDart 잔여 요청 한도가 부족하여 최대주주 지분율을 조회하지 않았습니다. (필요 {cost}회, 잔여 {dart_client.quota.remaining()}회)")
+            else:
+                with st.spinner("최대주주 지분율 조회 중..."):
+                    insider_map = fetch_insider_ownership(api_key, codes)
+                st.session_state["insider_codes"] = codes
+                df_result = df_result.assign(**{"최대주주지분(%)": df_result['종목코드'].map(insider_map)})
+
+    # 가격 통계 (memmap 가격 행렬이 있으면 전체 종목을 벡터 연산으로 계산)
+    price_matrix = load_price_matrix()
+    if price_matrix is not None and not df_result.empty:
+        df_price = price_matrix.summary()[["52주고점대비(%)", "3개월수익률(%)"]]
+        df_result = df_result.merge(df_price, left_on='종목코드', right_index=True, how='left')
     
     # Render Header with Date
     with placeholder.container():
@@ -776,6 +1087,9 @@ def render_dashboard(api_key):
 
         filtered_df = filtered_df[filtered_df['배당수익률(%)'] >= app_div]
 
+    # 검색 결과 종목의 1년 일봉을 백그라운드로 선조회 (주가 추이 탭에서 바로 표시)
+    prefetch_in_background(filtered_df['종목코드'].tolist(), TREND_PREFETCH_DAYS)
+
     
 
     # --- Top Metrics ---
@@ -830,7 +1144,9 @@ def render_dashboard(api_key):
 
             "종목명", "종목코드", "업종", "PBR(배)", "PER(배)", "배당수익률(%)", "ROE(%)", 
 
-            "시가총액(억)", "종합점수", "이익잉여금비율(%)", "현금비중(%)"
+            "시가총액(억)", "종합점수", "이익잉여금비율(%)", "현금비중(%)", "최대주주지분(%)",
+
+            "52주고점대비(%)", "3개월수익률(%)"
 
         ]
         
@@ -849,6 +1165,18 @@ def render_dashboard(api_key):
 
             hide_index=True
         )
+
+    # 가격 행렬 생성/갱신 (전체 종목 일봉 -> memmap)
+    with st.expander("📉 가격 통계 (52주 고점 대비, 3개월 수익률)"):
+        if price_matrix is None:
+            st.caption("가격 행렬이 없습니다. 아래 버튼으로 생성하세요.")
+        else:
+            built_str = datetime.datetime.fromtimestamp(price_matrix.built_at, KST).strftime("%Y.%m.%d %H:%M")
+            st.caption(f"기준: {built_str} / {len(price_matrix.codes)}개 종목")
+        if st.button("가격 행렬 생성/갱신", key="build_price_matrix"):
+            with st.spinner("대상 종목 일봉 수집 중..."):
+                build_from_store(df_result['종목코드'].tolist())
+            st.rerun()
     
 
     st.divider()
@@ -986,38 +1314,41 @@ def render_dashboard(api_key):
                 if not api_key:
                     st.warning("API Key가 필요합니다.")
                 else:
-                    client = OpenDartClient(api_key)
-                    # 1년치 데이터 (Pagination을 위해 전체 가져옴)
-                    if f"disclosures_{selected_code}" not in st.session_state:
-                        with st.spinner("공시 조회 중..."):
-                            st.session_state[f"disclosures_{selected_code}"] = client.get_disclosure_list(selected_code, months=12)
-                    
-                    disclosures = st.session_state.get(f"disclosures_{selected_code}", [])
+                    client = get_opendart_client(api_key, load_key_pool())
+
+                    # 보고서 유형 필터
+                    type_options = ["전체"] + list(DISCLOSURE_TYPES)
+                    report_type = st.selectbox("보고서 유형", type_options, key=f"disc_type_{selected_code}")
+
+                    # Pagination Logic (로컬 공시 저장소에서 페이지 단위 조회, 신규 공시만 동기화)
+                    items_per_page = 10
+                    page_key = f"page_num_{selected_code}"
+                    if page_key not in st.session_state:
+                        st.session_state[page_key] = 1
+
+                    with st.spinner("공시 조회 중..."):
+                        disclosures, total_items = client.get_disclosure_page(
+                            selected_code, report_type=report_type, months=12,
+                            page=st.session_state[page_key], per_page=items_per_page
+                        )
+                    total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
+
+                    # 유형 변경 등으로 전체 페이지 수가 줄어든 경우 마지막 페이지로 이동
+                    if st.session_state[page_key] > total_pages:
+                        st.session_state[page_key] = total_pages
+                        disclosures, total_items = client.get_disclosure_page(
+                            selected_code, report_type=report_type, months=12,
+                            page=total_pages, per_page=items_per_page
+                        )
 
                     if disclosures:
-                        # Pagination Logic
-                        items_per_page = 10
-                        total_items = len(disclosures)
-                        total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
-                        
-                        # Page Selector
-                        page_key = f"page_num_{selected_code}"
-                        if page_key not in st.session_state:
-                            st.session_state[page_key] = 1
-                            
-                        # Callback to reset page if code changes is handled by unique keys or user action, 
-                        # but simple unique key for widget is enough for now.
-                        
                         col_p1, col_p2 = st.columns([1, 3])
                         with col_p1:
-                             current_page = st.number_input("페이지", min_value=1, max_value=total_pages, step=1, key=page_key)
-                        
-                        start_idx = (current_page - 1) * items_per_page
-                        end_idx = start_idx + items_per_page
-                        
-                        page_items = disclosures[start_idx:end_idx]
-                        
-                        for d in page_items:
+                             st.number_input("페이지", min_value=1, max_value=total_pages, step=1, key=page_key)
+                        with col_p2:
+                             st.caption(f"총 {total_items}건")
+
+                        for d in disclosures:
                             title = d.get('title', '-')
                             url = d.get('url', '#')
                             date = d.get('date', '')
@@ -1221,36 +1552,38 @@ def render_analysis(api_key):
 
         if not target_code.isdigit():
 
-            # Search by Name
+            # Search by Name (listing index)
 
-            df_krx = get_krx_listing()
+            listing_index = get_listing_index()
 
             # Exact match first
 
-            exact_match = df_krx[df_krx['Name'] == target_code]
+            exact_code = listing_index.code_for_name(target_code)
 
-            if not exact_match.empty:
+            if exact_code:
 
-                target_code = exact_match.iloc[0]['Code']
+                target_code = exact_code
 
             else:
 
-                # Contains match
+                # Contains match (ranked)
 
-                contains_match = df_krx[df_krx['Name'].str.contains(target_code)]
+                contains_match = listing_index.contains(target_code)
 
                 if len(contains_match) == 1:
 
-                    target_code = contains_match.iloc[0]['Code']
+                    target_code = contains_match[0][0]
 
                 elif len(contains_match) > 1:
 
-                    st.warning(f"'{search_query}'(으)로 검색된 기업이 여러 개입니다. 정확한 이름을 입력해주세요: {', '.join(contains_match['Name'].tolist()[:5])}...")
+                    st.warning(f"'{search_query}'(으)로 검색된 기업이 여러 개입니다. 정확한 이름을 입력해주세요: {', '.join(name for _, name in contains_match[:5])}...")
                     return
 
                 else:
 
-                    st.error(f"'{search_query}' 기업을 찾을 수 없습니다. (KRX 리스트 기준)")
+                    suggestions = listing_index.suggest(target_code)
+                    hint = f" 혹시: {', '.join(name for _, name in suggestions)}" if suggestions else ""
+                    st.error(f"'{search_query}' 기업을 찾을 수 없습니다. (KRX 리스트 기준){hint}")
                     return
 
 
@@ -1351,9 +1684,9 @@ def render_analysis(api_key):
                     st.table(df_share)
 
 
-                # 3-Year Trend Table
+                # Multi-Year Trend Table
 
-                st.subheader("📊 최근 3년 재무 추이"
+                st.subheader(f"📊 최근 {len(history)}년 재무 추이"
 )
                 df_history = pd.DataFrame(history)
 
@@ -1405,6 +1738,9 @@ def render_stock_trend():
         disk_favs = load_favorites_from_disk()
         st.session_state['favorites_trend'] = disk_favs.get('trend', [])
 
+    # 즐겨찾기 종목 일봉 백그라운드 선조회 (최장 조회 기간 기준 -> 버튼 클릭 시 저장소에서 바로 표시)
+    prefetch_in_background([f['code'] for f in st.session_state['favorites_trend']], TREND_PREFETCH_DAYS)
+
 
     # --- [Favorites Logic - Scoped to Trend] ---
     def toggle_favorite(name, code):
@@ -1509,32 +1845,34 @@ def render_stock_trend():
 
         if not target_code.isdigit():
 
-             df_krx = get_krx_listing()
+             listing_index = get_listing_index()
 
-             match = df_krx[df_krx['Name'] == target_code]
+             exact_code = listing_index.code_for_name(target_code)
 
-             if not match.empty:
+             if exact_code:
 
-                 target_code = match.iloc[0]['Code']
+                 target_code = exact_code
 
              else:
 
-                 # Fuzzy match
+                 # Fuzzy match (ranked)
 
-                 matches = df_krx[df_krx['Name'].str.contains(target_code)]
+                 matches = listing_index.contains(target_code)
 
                  if len(matches) == 1:
 
-                     target_code = matches.iloc[0]['Code']
+                     target_code = matches[0][0]
 
                  elif len(matches) > 1:
 
-                     st.warning(f"검색된 기업이 여러 개입니다: {', '.join(matches['Name'].tolist()[:5])}...")
+                     st.warning(f"검색된 기업이 여러 개입니다: {', '.join(name for _, name in matches[:5])}...")
                      return
 
                  else:
 
-                     st.error("기업을 찾을 수 없습니다.")
+                     suggestions = listing_index.suggest(target_code)
+                     hint = f" 혹시: {', '.join(name for _, name in suggestions)}" if suggestions else ""
+                     st.error(f"기업을 찾을 수 없습니다.{hint}")
                      return
 
 
@@ -1558,11 +1896,7 @@ def render_stock_trend():
 
             try:
 
-                 df_krx = get_krx_listing()
-
-                 name_row = df_krx[df_krx['Code'] == target_code]
-
-                 corp_name = name_row.iloc[0]['Name'] if not name_row.empty else target_code
+                 corp_name = get_listing_index().name_of(target_code, target_code)
 
             except:
 